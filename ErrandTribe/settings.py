@@ -5,6 +5,7 @@ Django settings for ErrandTribe project.
 from pathlib import Path
 import os
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -26,6 +27,24 @@ ALLOWED_HOSTS = config(
 )
 
 BREVO_API_KEY = os.getenv("BREVO_API_KEY")
+BREVO_API_URL = config('BREVO_API_URL', default='https://api.brevo.com/v3')
+FLUTTERWAVE_BASE_URL = config('FLUTTERWAVE_BASE_URL', default='https://api.flutterwave.com')
+
+TWILIO_API_URL = config('TWILIO_API_URL', default='https://api.twilio.com')
+
+# Pooled outbound HTTP clients (core.http); OUTBOUND_PROVIDERS overrides any default per provider
+OUTBOUND_HTTP_POOL_SIZE = config('OUTBOUND_HTTP_POOL_SIZE', default=100, cast=int)
+OUTBOUND_HTTP_TIMEOUT = config('OUTBOUND_HTTP_TIMEOUT', default=15, cast=float)
+OUTBOUND_HTTP_CONNECT_TIMEOUT = config('OUTBOUND_HTTP_CONNECT_TIMEOUT', default=5, cast=float)
+OUTBOUND_HTTP_RETRIES = config('OUTBOUND_HTTP_RETRIES', default=2, cast=int)
+OUTBOUND_HTTP_BACKOFF = config('OUTBOUND_HTTP_BACKOFF', default=0.2, cast=float)
+OUTBOUND_BREAKER_FAILURES = config('OUTBOUND_BREAKER_FAILURES', default=5, cast=int)
+OUTBOUND_BREAKER_RESET_SECONDS = config('OUTBOUND_BREAKER_RESET_SECONDS', default=30, cast=float)
+OUTBOUND_PROVIDERS = {
+    'flutterwave': {'timeout': 20},
+    'brevo': {'timeout': 10},
+    'twilio': {'timeout': 10},
+}
 
 
 # Application definition
@@ -43,9 +62,10 @@ THIRD_PARTY_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     'phonenumber_field',
+    'channels',
 ]
 LOCAL_APPS = [
-    'authentication',
+    'authentication.apps.AuthenticationConfig',
     # 'dashboard',
     'core',
     'dashboard.apps.DashboardConfig',
@@ -57,7 +77,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.AsyncWhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -85,6 +105,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'ErrandTribe.wsgi.application'
+ASGI_APPLICATION = 'ErrandTribe.asgi.application'
 
 
 # Database (MySQL)
@@ -110,6 +131,19 @@ AUTH_USER_MODEL = "authentication.User"
 
 
 # Password validation
+# Argon2 first: PBKDF2 hashes stay valid and are rehashed on the next successful login
+PASSWORD_HASHERS = [
+    'authentication.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+ARGON2_TIME_COST = config('ARGON2_TIME_COST', default=2, cast=int)
+ARGON2_MEMORY_COST = config('ARGON2_MEMORY_COST', default=19456, cast=int)  # KiB
+ARGON2_PARALLELISM = config('ARGON2_PARALLELISM', default=1, cast=int)
+
+# last_login is written at most once per interval, however often a user logs in
+LAST_LOGIN_UPDATE_INTERVAL = config('LAST_LOGIN_UPDATE_INTERVAL', default=15 * 60, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -141,7 +175,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.tokens.ClaimsJWTAuthentication',
     ),
     # ✅ AllowAny globally so registration/login works
     'DEFAULT_PERMISSION_CLASSES': [
@@ -152,6 +186,40 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Per-IP throttles key on the client address. Behind the platform's router it is
+    # the last X-Forwarded-For entry, the one the router appends; earlier entries are
+    # whatever the client sent. Set to the number of proxies in front of the app,
+    # 0 when it is reached directly
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
+    'DEFAULT_THROTTLE_RATES': {
+        'errand_apply': config('ERRAND_APPLY_RATE', default='30/min'),
+        'login_ip': config('LOGIN_IP_RATE', default='30/min'),
+        'login_account': config('LOGIN_ACCOUNT_RATE', default='10/min'),
+        'signup_ip': config('SIGNUP_IP_RATE', default='10/hour'),
+        'otp_request_ip': config('OTP_REQUEST_IP_RATE', default='10/hour'),
+        'otp_request_account': config('OTP_REQUEST_ACCOUNT_RATE', default='5/hour'),
+        'otp_email': config('OTP_EMAIL_RATE', default='3000/hour'),
+        'otp_verify_ip': config('OTP_VERIFY_IP_RATE', default='30/min'),
+        'otp_verify_account': config('OTP_VERIFY_ACCOUNT_RATE', default='10/hour'),
+    },
+}
+
+# Upper bound on items accepted by the bulk create endpoints
+BULK_CREATE_MAX_ITEMS = config('BULK_CREATE_MAX_ITEMS', default=1000, cast=int)
+
+# Grid size (in degrees, ~5.5km at 0.05) used to bucket errands into feed location cells
+FEED_CELL_SIZE_DEGREES = config('FEED_CELL_SIZE_DEGREES', default=0.05, cast=float)
+
+# Recommended errands ranking
+RECOMMENDATION_TOP_K = config('RECOMMENDATION_TOP_K', default=200, cast=int)
+# Runners who logged in within this many days get their lists precomputed
+RECOMMENDATION_ACTIVE_DAYS = config('RECOMMENDATION_ACTIVE_DAYS', default=7, cast=int)
+RECOMMENDATION_DISTANCE_SCALE_KM = config('RECOMMENDATION_DISTANCE_SCALE_KM', default=5.0, cast=float)
+# Highest minimum price a runner of each tier is offered (None = no cap)
+RECOMMENDATION_TIER_PRICE_CAPS = {
+    'Tier 1': 20000,
+    'Tier 2': 100000,
+    'Tier 3': None,
 }
 
 # JWT Configuration
@@ -160,15 +228,19 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.tokens.ClaimsTokenRefreshSerializer',
 }
 
+# Per-process memory of user changes in front of the shared cache (authentication.tokens)
+AUTH_LOCAL_CACHE_SECONDS = config('AUTH_LOCAL_CACHE_SECONDS', default=5, cast=int)
+
 
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
@@ -199,8 +271,130 @@ TWILIO_PHONE_NUMBER = config('TWILIO_PHONE_NUMBER', default='')
 
 
 # Celery (Redis)
-CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
+REDIS_URL = config('REDIS_URL', default='')
+CELERY_BROKER_URL = REDIS_URL or 'redis://localhost:6379/0'
+CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+# Jobs route to the queues in core.jobs; with the priority strategy a worker
+# consuming several queues drains them in the order given to -Q
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_BROKER_TRANSPORT_OPTIONS = {'queue_order_strategy': 'priority', 'visibility_timeout': 3600}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_RESULT_EXPIRES = 24 * 60 * 60
+# Run jobs inline in the calling process (tests, local development without a broker).
+# As with a broker, a failing job doesn't raise into the caller; read it off the result
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = False
+CELERY_BEAT_SCHEDULE = {
+    'refresh-recommendations': {
+        'task': 'dashboard.tasks.refresh_recommendations',
+        'schedule': config('RECOMMENDATION_REFRESH_SECONDS', default=60 * 60, cast=int),
+    },
+    'settle-escrows': {
+        'task': 'dashboard.tasks.settle_escrows',
+        'schedule': config('ESCROW_SETTLEMENT_INTERVAL_SECONDS', default=5 * 60, cast=int),
+    },
+    'run-maintenance': {
+        'task': 'core.tasks.run_maintenance',
+        'schedule': config('MAINTENANCE_INTERVAL_SECONDS', default=5 * 60, cast=int),
+    },
+}
+
+# Completing a task or errand leaves its held escrow to dashboard.tasks.settle_escrows,
+# which releases completed escrows in chunked batches; off, completion pays out at once
+ESCROW_BATCH_SETTLEMENT = config('ESCROW_BATCH_SETTLEMENT', default=True, cast=bool)
+ESCROW_SETTLEMENT_CHUNK_SIZE = config('ESCROW_SETTLEMENT_CHUNK_SIZE', default=500, cast=int)
+
+# Expiry and cleanup steps (core.maintenance), run as UPDATEs of at most
+# MAINTENANCE_BATCH_SIZE rows with a pause between batches
+MAINTENANCE_BATCH_SIZE = config('MAINTENANCE_BATCH_SIZE', default=1000, cast=int)
+MAINTENANCE_BATCH_PAUSE_SECONDS = config('MAINTENANCE_BATCH_PAUSE_SECONDS', default=0.05, cast=float)
+EMAIL_OTP_LIFETIME_MINUTES = config('EMAIL_OTP_LIFETIME_MINUTES', default=30, cast=int)
+
+# Application, review and transaction history older than ARCHIVE_AFTER_DAYS is moved
+# to archive tables partitioned by month (dashboard.maintenance). Partitions are made
+# ARCHIVE_PARTITIONS_AHEAD months in advance and detached after ARCHIVE_RETENTION_MONTHS;
+# 0 keeps them attached
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=180, cast=int)
+ARCHIVE_PARTITIONS_AHEAD = config('ARCHIVE_PARTITIONS_AHEAD', default=3, cast=int)
+ARCHIVE_RETENTION_MONTHS = config('ARCHIVE_RETENTION_MONTHS', default=84, cast=int)
+
+# Uploaded images are rewritten by core.tasks.normalize_image
+IMAGE_MAX_DIMENSION = config('IMAGE_MAX_DIMENSION', default=1600, cast=int)
+IMAGE_JPEG_QUALITY = config('IMAGE_JPEG_QUALITY', default=85, cast=int)
+
+
+# Cache: shared Redis, which the outbox relay and Celery workers write to and invalidate
+# for the web processes. Per-process memory only holds within one process, so it is
+# refused unless DEBUG
+CACHE_URL = config('CACHE_URL', default=REDIS_URL)
+if not CACHE_URL and not DEBUG:
+    raise ImproperlyConfigured("CACHE_URL (or REDIS_URL) must be set when DEBUG is off.")
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Token buckets behind the throttles (core.ratelimit), shared in Redis so a limit holds
+# across every worker; per process only for RATELIMIT_FAILOVER_SECONDS after a Redis
+# error. Per-process buckets would multiply each limit by the number of workers, so
+# they are refused unless DEBUG
+RATELIMIT_URL = config('RATELIMIT_URL', default=REDIS_URL)
+if not RATELIMIT_URL and not DEBUG:
+    raise ImproperlyConfigured("RATELIMIT_URL (or REDIS_URL) must be set when DEBUG is off.")
+RATELIMIT_REDIS_TIMEOUT = config('RATELIMIT_REDIS_TIMEOUT', default=0.1, cast=float)
+RATELIMIT_FAILOVER_SECONDS = config('RATELIMIT_FAILOVER_SECONDS', default=30, cast=int)
+
+
+# Revoked token IDs (authentication.revocation): Redis keys mirrored into a per-process
+# Bloom filter, so checking an unrevoked token never leaves the process. The in-memory
+# store without a URL only holds within one process, so it is refused unless DEBUG
+REVOCATION_URL = config('REVOCATION_URL', default=REDIS_URL)
+REVOCATION_BLOOM_CAPACITY = config('REVOCATION_BLOOM_CAPACITY', default=1000000, cast=int)
+REVOCATION_BLOOM_ERROR_RATE = config('REVOCATION_BLOOM_ERROR_RATE', default=0.001, cast=float)
+REVOCATION_EXPIRY_SECONDS = config('REVOCATION_EXPIRY_SECONDS', default=60, cast=int)
+
+
+# Real-time events: Redis pub/sub fans out across nodes and from the outbox relay and
+# Celery workers to the web processes; in-memory layer for a single process and tests
+CHANNEL_LAYER_URL = config('CHANNEL_LAYER_URL', default=REDIS_URL)
+if CHANNEL_LAYER_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {'hosts': [CHANNEL_LAYER_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Server-sent events feed stream
+SSE_HEARTBEAT_SECONDS = config('SSE_HEARTBEAT_SECONDS', default=15, cast=int)
+SSE_POLL_SECONDS = config('SSE_POLL_SECONDS', default=5, cast=int)
+SSE_RETRY_MILLISECONDS = config('SSE_RETRY_MILLISECONDS', default=3000, cast=int)
+SSE_CLIENT_QUEUE_SIZE = config('SSE_CLIENT_QUEUE_SIZE', default=32, cast=int)
+
+# Transactional outbox (core.outbox): side effects of committed writes, delivered by the relay
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=100, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+OUTBOX_RETRY_CAP_SECONDS = config('OUTBOX_RETRY_CAP_SECONDS', default=300, cast=int)
+OUTBOX_POLL_SECONDS = config('OUTBOX_POLL_SECONDS', default=1.0, cast=float)
+
+# Cached session bootstrap payload; writes that change it invalidate the entry sooner
+SESSION_BOOTSTRAP_CACHE_SECONDS = config('SESSION_BOOTSTRAP_CACHE_SECONDS', default=300, cast=int)
 
 
 # File Upload Settings
@@ -7,6 +7,7 @@ from authentication.views import (
     signup,
     create_password,
     login_view,
+    logout_view,
     forgot_password,
     reset_password,
     verify_email_otp,
@@ -34,7 +35,12 @@ from django.conf.urls.static import static
 from dashboard.views import CreateTaskView, SupermarketRunCreateView, StartTaskJourneyView, PickupDeliveryCreateView, \
     ErrandImageUploadView, CareTaskCreateView, VerificationTaskCreateView, UserTierView, PostedErrandsView, \
     ErrandDetailView, RecommendedTasksView, AvailableTasksView, ApplyErrandView, ErrandApplicationsListView, \
-    UpdateApplicationStatusView, ReviewRunnerView, AppliedRunnerDetailsView
+    UpdateApplicationStatusView, ReviewRunnerView, AppliedRunnerDetailsView, BulkErrandCreateView, \
+    BulkPickupDeliveryCreateView, BulkCareTaskCreateView, BulkVerificationTaskCreateView, ExportView, \
+    ErrandFeedView, MyPostedFeedView, EscrowActionView, TaskStatisticView, \
+    SessionBootstrapView
+from dashboard.streams import errand_feed_stream
+from core.views import MetricsView
 
 schema_view = get_schema_view(
    openapi.Info(
@@ -60,6 +66,7 @@ urlpatterns = [
     path("auth/get-started/", get_started, name="get-started"),
     path("auth/signup/", signup, name="signup"),
     path("auth/login/", login_view, name="login"),
+    path("auth/logout/", logout_view, name="logout"),
     path("users/<uuid:user_id>/set-password/", create_password, name="set-password"),
     path("auth/forgot-password/", forgot_password, name="forgot-password"),
     path("users/<uuid:user_id>/reset-password/", reset_password, name="reset-password"),
@@ -92,27 +99,41 @@ urlpatterns = [
    path('api/supermarket-run/', SupermarketRunCreateView.as_view(), name='supermarket-run-create'),
 
     path('api/errands/pickup-delivery/', PickupDeliveryCreateView.as_view(), name='pickup-delivery-create'),
+    path('api/errands/pickup-delivery/bulk/', BulkPickupDeliveryCreateView.as_view(), name='pickup-delivery-bulk-create'),
     path('api/errands/upload-image/', ErrandImageUploadView.as_view(), name='upload-errand-image'),
 
     path('api/care-tasks/', CareTaskCreateView.as_view(), name='create-care-task'),
+    path('api/care-tasks/bulk/', BulkCareTaskCreateView.as_view(), name='bulk-create-care-task'),
 
     path('api/verification-tasks/', VerificationTaskCreateView.as_view(), name='create-verification-task'),
+    path('api/verification-tasks/bulk/', BulkVerificationTaskCreateView.as_view(), name='bulk-create-verification-task'),
 
     path('api/user/tier/', UserTierView.as_view(), name='user-tier'),
+    path('api/user/stats/', TaskStatisticView.as_view(), name='user-stats'),
+    path('api/session/bootstrap/', SessionBootstrapView.as_view(), name='session-bootstrap'),
 
     path('posted-errands/', PostedErrandsView.as_view(), name='posted-errands'),
+    path('posted-errands/bulk/', BulkErrandCreateView.as_view(), name='bulk-create-errands'),
 
     path('errand/<uuid:id>/', ErrandDetailView.as_view(), name='errand-detail'),
 
     path('api/tasks/recommended/', RecommendedTasksView.as_view(), name='recommended-tasks'),
     path('api/tasks/available/', AvailableTasksView.as_view(), name='available-tasks'),
+    path('api/tasks/available/stream/', errand_feed_stream, name='available-tasks-stream'),
 
-    path('errands/<uuid:errand_id>/apply/', ApplyErrandView.as_view(), name='apply-errand'),
+    path('api/feed/', ErrandFeedView.as_view(), name='errand-feed'),
+    path('api/feed/mine/', MyPostedFeedView.as_view(), name='my-errand-feed'),
+
+    path('errands/<int:errand_id>/apply/', ApplyErrandView.as_view(), name='apply-errand'),
     path('errands/<uuid:errand_id>/applications/', ErrandApplicationsListView.as_view(), name='errand-applications'),
-    path('applications/<uuid:application_id>/status/', UpdateApplicationStatusView.as_view(), name='update-application-status'),
+    path('applications/<int:application_id>/status/', UpdateApplicationStatusView.as_view(), name='update-application-status'),
 
     path("applications/<uuid:application_id>/review/", ReviewRunnerView.as_view(), name="review-runner"),
     path("applications/<uuid:application_id>/runner-details/",AppliedRunnerDetailsView.as_view(),name="runner-details"),
+
+    path("api/escrow/<uuid:escrow_id>/<str:action>/", EscrowActionView.as_view(), name="escrow-action"),
+
+    path("api/exports/<str:dataset>/<str:file_format>/", ExportView.as_view(), name="export"),
     re_path(r"^docs/swagger(?P<format>\.json|\.yaml)$",
             schema_view.without_ui(cache_timeout=0), name="schema-json"),
 
@@ -120,6 +141,7 @@ urlpatterns = [
     path("docs/redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
 
     path("health/", health_check, name="health-check"),
+    path("internal/metrics/", MetricsView.as_view(), name="internal-metrics"),
 
     path("auth/", include("authentication.urls")),
 
@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from core.maintenance import step, update_in_batches
+
+
+@step("expire_email_otps")
+def expire_email_otps(batch_size):
+    cutoff = timezone.now() - timedelta(minutes=settings.EMAIL_OTP_LIFETIME_MINUTES)
+    stale = get_user_model().objects.filter(email_otp__isnull=False, email_otp_created_at__lt=cutoff)
+    return update_in_batches(stale, batch_size, email_otp=None, email_otp_created_at=None)
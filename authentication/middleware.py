@@ -0,0 +1,28 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError, AuthenticationFailed
+
+from .tokens import ClaimsJWTAuthentication
+
+
+@database_sync_to_async
+def user_for_token(raw_token):
+    authentication = ClaimsJWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware:
+    """Authenticates WebSocket connections from an access token passed as ?token=."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get("query_string", b"").decode()).get("token")
+        scope = dict(scope, user=await user_for_token(token[0]) if token else AnonymousUser())
+        return await self.app(scope, receive, send)
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+FLAGS = {
+    "is_email_verified": 1 << 0,
+    "is_identity_verified": 1 << 1,
+    "has_uploaded_picture": 1 << 2,
+    "has_enabled_location": 1 << 3,
+    "has_withdrawal_method": 1 << 4,
+    "has_funded_wallet": 1 << 5,
+}
+TERMS_ACCEPTED = 1 << 6
+
+
+def pack_flags(apps, schema_editor):
+    User = apps.get_model("authentication", "User")
+    for field, flag in FLAGS.items():
+        User.objects.filter(**{field: True}).update(onboarding_flags=F("onboarding_flags").bitor(flag))
+    User.objects.filter(terms__accepted=True).update(
+        onboarding_flags=F("onboarding_flags").bitor(TERMS_ACCEPTED)
+    )
+
+
+def unpack_flags(apps, schema_editor):
+    User = apps.get_model("authentication", "User")
+    for field, flag in FLAGS.items():
+        User.objects.annotate(bit=F("onboarding_flags").bitand(flag)).filter(bit=flag).update(**{field: True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_termsandcondition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='onboarding_flags',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(pack_flags, unpack_flags),
+    ] + [
+        migrations.RemoveField(model_name='user', name=field) for field in FLAGS
+    ]
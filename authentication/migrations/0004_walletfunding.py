@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_user_onboarding_flags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletFunding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(max_length=100, unique=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fundings', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
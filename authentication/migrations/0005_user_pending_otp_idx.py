@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_walletfunding'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('email_otp__isnull', False)), fields=['email_otp_created_at'], name='user_pending_otp_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ import uuid
 
 from django.contrib.auth.models import BaseUserManager, AbstractUser
 from django.db import models
+from django.db.models import F, Q
 from django.utils import timezone
 
 from ErrandTribe import settings
@@ -30,6 +31,42 @@ class CustomUserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
+class Onboarding:
+    """Bits of User.onboarding_flags, one per completed onboarding step."""
+
+    EMAIL_VERIFIED = 1 << 0
+    IDENTITY_VERIFIED = 1 << 1
+    PICTURE_UPLOADED = 1 << 2
+    LOCATION_ENABLED = 1 << 3
+    WITHDRAWAL_METHOD = 1 << 4
+    WALLET_FUNDED = 1 << 5
+    TERMS_ACCEPTED = 1 << 6
+
+    # Steps login requires, in the order the client prompts for them.
+    LOGIN_STEPS = [
+        (EMAIL_VERIFIED, "Verify your email"),
+        (IDENTITY_VERIFIED, "Verify your identity"),
+        (PICTURE_UPLOADED, "Upload your profile picture"),
+        (LOCATION_ENABLED, "Enable location"),
+        # (WITHDRAWAL_METHOD, "Add a withdrawal method"),
+        # (WALLET_FUNDED, "Fund your wallet"),
+    ]
+
+    NAMES = {
+        "is_email_verified": EMAIL_VERIFIED,
+        "is_identity_verified": IDENTITY_VERIFIED,
+        "has_uploaded_picture": PICTURE_UPLOADED,
+        "has_enabled_location": LOCATION_ENABLED,
+        "has_withdrawal_method": WITHDRAWAL_METHOD,
+        "has_funded_wallet": WALLET_FUNDED,
+        "has_accepted_terms": TERMS_ACCEPTED,
+    }
+
+
+def _onboarding_step(flag):
+    return property(lambda user: user.has_onboarded(flag))
+
+
 class User(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     username = None
@@ -42,12 +79,15 @@ class User(AbstractUser):
         blank=True,
     )
 
-    is_email_verified = models.BooleanField(default=False)
-    is_identity_verified = models.BooleanField(default=False)
-    has_uploaded_picture = models.BooleanField(default=False)
-    has_enabled_location = models.BooleanField(default=False)
-    has_withdrawal_method = models.BooleanField(default=False)
-    has_funded_wallet = models.BooleanField(default=False)
+    onboarding_flags = models.PositiveSmallIntegerField(default=0)
+
+    is_email_verified = _onboarding_step(Onboarding.EMAIL_VERIFIED)
+    is_identity_verified = _onboarding_step(Onboarding.IDENTITY_VERIFIED)
+    has_uploaded_picture = _onboarding_step(Onboarding.PICTURE_UPLOADED)
+    has_enabled_location = _onboarding_step(Onboarding.LOCATION_ENABLED)
+    has_withdrawal_method = _onboarding_step(Onboarding.WITHDRAWAL_METHOD)
+    has_funded_wallet = _onboarding_step(Onboarding.WALLET_FUNDED)
+    has_accepted_terms = _onboarding_step(Onboarding.TERMS_ACCEPTED)
 
     profile_picture = models.ImageField(upload_to="profile_pictures/", blank=True, null=True)
     wallet_balance = models.DecimalField(default=0.00, max_digits=12, decimal_places=2)
@@ -67,6 +107,42 @@ class User(AbstractUser):
     REQUIRED_FIELDS = ["first_name", "last_name", "phone_number"]
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Only users holding an OTP, which maintenance keeps to those issued recently.
+            models.Index(
+                fields=["email_otp_created_at"],
+                name="user_pending_otp_idx",
+                condition=Q(email_otp__isnull=False),
+            ),
+        ]
+
+    def has_onboarded(self, flag):
+        return self.onboarding_flags & flag == flag
+
+    def onboarding_state(self):
+        return {name: self.has_onboarded(flag) for name, flag in Onboarding.NAMES.items()}
+
+    def mark_onboarded(self, flag, **fields):
+        """
+        Sets onboarding bits with an atomic OR, so two steps completed at once never
+        overwrite each other. Extra fields are written in the same UPDATE; expressions
+        among them (F("wallet_balance") + amount) are read back afterwards.
+        """
+        from dashboard.session import invalidate_session
+        from .tokens import refresh_principals
+
+        User.objects.filter(pk=self.pk).update(onboarding_flags=F("onboarding_flags").bitor(flag), **fields)
+        self.onboarding_flags |= flag
+        computed = [name for name, value in fields.items() if hasattr(value, "resolve_expression")]
+        for name, value in fields.items():
+            if name not in computed:
+                setattr(self, name, value)
+        if computed:
+            self.refresh_from_db(fields=computed)
+        invalidate_session([self.pk])
+        refresh_principals([self.pk])
+
     def set_email_otp(self, otp):
         self.email_otp = otp
         self.email_otp_created_at = timezone.now()
@@ -120,6 +196,17 @@ class WithdrawalMethod(models.Model):
     def __str__(self):
         return f"{self.method_type} - {self.account_name}"
 
+class WalletFunding(models.Model):
+    """One row per provider payment credited, so verifying it again credits nothing."""
+
+    reference = models.CharField(max_length=100, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="fundings")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.reference} - {self.amount}"
+
 class TermsAndCondition(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="terms")
     accepted = models.BooleanField(default=False)
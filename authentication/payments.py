@@ -0,0 +1,48 @@
+import os
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+
+from core import outbox
+from dashboard import events
+from .models import Onboarding, WalletFunding
+
+
+def flutterwave_verify_request(transaction_id):
+    url = f"{settings.FLUTTERWAVE_BASE_URL}/v3/transactions/{transaction_id}/verify"
+    return url, {"Authorization": f"Bearer {os.environ.get('FLW_SECRET_KEY')}"}
+
+
+def check_verification(data, expected_amount):
+    """(error, charged amount, tx_ref) from a Flutterwave verify response."""
+    if data.get("status") != "success":
+        return "Verification failed", None, None
+    tx_data = data.get("data", {})
+    if tx_data.get("status") != "successful":
+        return "Transaction not successful", None, None
+    charged_amount = Decimal(str(tx_data.get("amount")))
+    if charged_amount < Decimal(str(expected_amount)):
+        return "Charged amount less than expected", None, None
+    return None, charged_amount, tx_data.get("tx_ref")
+
+
+@transaction.atomic
+def credit_user_wallet(user_id, amount, reference=None):
+    user = get_object_or_404(get_user_model(), id=user_id)
+    if reference:
+        _, created = WalletFunding.objects.get_or_create(
+            reference=reference, defaults={"user": user, "amount": amount}
+        )
+        if not created:
+            return user
+    # Added in the UPDATE itself: the verify job and the request path can credit the
+    # same user concurrently under different references.
+    user.mark_onboarded(Onboarding.WALLET_FUNDED, wallet_balance=F("wallet_balance") + amount)
+    outbox.emit(events.WALLET_FUNDED, {
+        "user": str(user.pk), "amount": str(amount), "reference": reference,
+    }, aggregate=user)
+    return user
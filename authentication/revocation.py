@@ -0,0 +1,270 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.settings import api_settings
+
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY = "auth:revoked:{jti}"
+REVOKED_CHANNEL = "auth:revoked"
+
+
+class RevocationUnavailable(APIException):
+    """The shared store couldn't be reached to check or record a revocation."""
+
+    status_code = 503
+    default_detail = _("Token revocation is unavailable right now; try again shortly.")
+    default_code = "revocation_unavailable"
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big")
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationFront:
+    """
+    Two generations of Bloom filters, each spanning the longest token lifetime. A
+    revoked JTI stays in the front at least as long as its token could be presented,
+    and the filters never need deleting from.
+    """
+
+    def __init__(self, capacity, error_rate, window):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.window = window
+        self.lock = threading.Lock()
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = BloomFilter(capacity, error_rate)
+        self.rotated_at = time.monotonic()
+
+    def add(self, jti):
+        with self.lock:
+            self.current.add(jti)
+
+    def might_contain(self, jti):
+        return jti in self.current or jti in self.previous
+
+    def rotate_if_due(self):
+        with self.lock:
+            if time.monotonic() - self.rotated_at < self.window:
+                return False
+            self.previous, self.current = self.current, BloomFilter(self.capacity, self.error_rate)
+            self.rotated_at = time.monotonic()
+            return True
+
+
+class BaseRevocationStore:
+    """
+    When the shared store can't be reached (RevocationUnavailable from _store or
+    _exists) the policy depends on the caller:
+
+    - access checks fail open, logged and counted, rather than failing every request
+      whose token is a Bloom positive;
+    - refresh checks and rotation fail closed (``strict``), so a refresh token can't
+      be spent twice while the store is down;
+    - logout revokes locally and queues the write, retried on every expiry pass
+      until the store takes it.
+    """
+
+    def __init__(self):
+        lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+        self.front = RevocationFront(
+            settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE, lifetime.total_seconds()
+        )
+        self.pending_lock = threading.Lock()
+        self.pending = {}
+
+    def revoke(self, jti, expires_at, strict=False):
+        """Revokes a JTI; False if it already was, so a rotated token can only be spent once."""
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return True
+        self.front.add(jti)
+        try:
+            created = self._store(jti, ttl)
+        except RevocationUnavailable:
+            logger.warning("Revocation store unavailable; %s", "rejecting" if strict else "queueing", exc_info=True)
+            registry.inc("token_revocation_errors_total", operation="revoke")
+            if strict:
+                raise
+            with self.pending_lock:
+                self.pending[jti] = expires_at
+            return True
+        if not created:
+            return False
+        registry.inc("token_revocations_total")
+        return True
+
+    def is_revoked(self, jti, strict=False):
+        if not self.front.might_contain(jti):
+            registry.inc("token_revocation_checks_total", outcome="bloom_negative")
+            return False
+        if jti in self.pending:
+            return True
+        try:
+            revoked = self._exists(jti)
+        except RevocationUnavailable:
+            logger.warning("Revocation store unavailable; %s", "rejecting" if strict else "allowing", exc_info=True)
+            registry.inc("token_revocation_checks_total", outcome="unavailable")
+            if strict:
+                raise
+            return False
+        registry.inc("token_revocation_checks_total", outcome="revoked" if revoked else "false_positive")
+        return revoked
+
+    def retry_pending(self):
+        with self.pending_lock:
+            pending = list(self.pending.items())
+        for jti, expires_at in pending:
+            ttl = int(expires_at - time.time())
+            if ttl > 0:
+                try:
+                    self._store(jti, ttl)
+                except RevocationUnavailable:
+                    return
+                registry.inc("token_revocations_total")
+            with self.pending_lock:
+                self.pending.pop(jti, None)
+
+    def expire(self):
+        self.front.rotate_if_due()
+        self.retry_pending()
+
+
+class MemoryRevocationStore(BaseRevocationStore):
+    """Single-process store for development and tests."""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def _store(self, jti, ttl):
+        with self.lock:
+            if self._exists(jti):
+                return False
+            self.entries[jti] = time.time() + ttl
+            return True
+
+    def _exists(self, jti):
+        expires_at = self.entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def expire(self):
+        super().expire()
+        now = time.time()
+        with self.lock:
+            for jti in [jti for jti, expires_at in self.entries.items() if expires_at <= now]:
+                del self.entries[jti]
+
+
+class RedisRevocationStore(BaseRevocationStore):
+    """
+    Revoked JTIs as Redis keys that expire with their tokens. Every process mirrors
+    them into its Bloom front from a pub/sub channel, reloading the key space
+    whenever it (re)subscribes so no revocation is missed across a disconnect.
+    """
+
+    def __init__(self, url):
+        import redis
+
+        super().__init__()
+        self.redis = redis
+        self.client = redis.Redis.from_url(url)
+        self.ready = threading.Event()
+        threading.Thread(target=self._listen, name="revocation-listener", daemon=True).start()
+        self.ready.wait(timeout=5)
+
+    def _store(self, jti, ttl):
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.set(REVOKED_KEY.format(jti=jti), 1, ex=ttl, nx=True)
+        pipeline.publish(REVOKED_CHANNEL, jti)
+        try:
+            created, _ = pipeline.execute()
+        except self.redis.RedisError as exc:
+            raise RevocationUnavailable() from exc
+        return bool(created)
+
+    def _exists(self, jti):
+        try:
+            return bool(self.client.exists(REVOKED_KEY.format(jti=jti)))
+        except self.redis.RedisError as exc:
+            raise RevocationUnavailable() from exc
+
+    def _load(self):
+        prefix = REVOKED_KEY.format(jti="")
+        for key in self.client.scan_iter(match=f"{prefix}*", count=1000):
+            self.front.add(key.decode()[len(prefix):])
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REVOKED_CHANNEL)
+                self._load()
+                self.ready.set()
+                for message in pubsub.listen():
+                    self.front.add(message["data"].decode())
+            except self.redis.RedisError:
+                logger.warning("Revocation listener lost Redis; resubscribing", exc_info=True)
+                time.sleep(1)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _expire_forever(store):
+    while True:
+        time.sleep(settings.REVOCATION_EXPIRY_SECONDS)
+        try:
+            store.expire()
+        except Exception:
+            logger.exception("Revocation expiry failed")
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            url = settings.REVOCATION_URL
+            if not url and not settings.DEBUG:
+                # Rotation and logout would only hold in the process that saw them.
+                raise ImproperlyConfigured("REVOCATION_URL (or REDIS_URL) must be set when DEBUG is off.")
+            _store = RedisRevocationStore(url) if url else MemoryRevocationStore()
+            threading.Thread(target=_expire_forever, args=(_store,), name="revocation-expiry", daemon=True).start()
+        return _store
+
+
+def revoke_token(token, strict=False):
+    return get_store().revoke(token[api_settings.JTI_CLAIM], token["exp"], strict=strict)
+
+
+def is_token_revoked(token, strict=False):
+    return get_store().is_revoked(token[api_settings.JTI_CLAIM], strict=strict)
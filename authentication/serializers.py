@@ -60,6 +60,10 @@ class LoginSerializer(serializers.Serializer):
         return data
 
 
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
 class EmailOTPSerializer(serializers.Serializer):
     email = serializers.EmailField()
     otp = serializers.CharField(required=False, max_length=6)
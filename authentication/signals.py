@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .tokens import CLAIM_FIELDS, refresh_principals
+
+
+@receiver(post_save, sender=get_user_model())
+def refresh_user_principal(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # New users have no tokens yet; saves that only touch OTPs or passwords leave the claims alone.
+    if created or raw or (update_fields is not None and not set(update_fields) & set(CLAIM_FIELDS)):
+        return
+    refresh_principals([instance.pk])
+
+
+@receiver(post_delete, sender=get_user_model())
+def revoke_deleted_user(sender, instance, **kwargs):
+    refresh_principals([instance.pk])
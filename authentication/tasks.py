@@ -0,0 +1,33 @@
+import logging
+
+from django.contrib.auth import get_user_model
+
+from core.exceptions import ProviderError
+from core.http import get_client
+from core.jobs import NOTIFICATIONS, PAYMENTS, job
+from .payments import check_verification, credit_user_wallet, flutterwave_verify_request
+from .utils import send_email_otp
+
+logger = logging.getLogger(__name__)
+
+
+# send_email_otp reports every failure as a plain Exception, all of them worth a retry.
+@job(NOTIFICATIONS, autoretry_for=(Exception,), max_retries=3)
+def deliver_email_otp(user_id):
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is not None:
+        send_email_otp(user)
+
+
+@job(PAYMENTS, autoretry_for=(ProviderError,), max_retries=8)
+def verify_flutterwave_payment(transaction_id, user_id, expected_amount):
+    """Finishes a verification the request could not, while the provider was unreachable."""
+    url, headers = flutterwave_verify_request(transaction_id)
+    data = get_client("flutterwave").request("GET", url, headers=headers).json()
+
+    error, charged_amount, tx_ref = check_verification(data, expected_amount)
+    if error:
+        logger.warning("Payment %s not credited: %s", transaction_id, error)
+        return None
+    credit_user_wallet(user_id, charged_amount, tx_ref)
+    return str(charged_amount)
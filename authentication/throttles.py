@@ -0,0 +1,45 @@
+from core.ratelimit import EmailBucketThrottle, IPBucketThrottle, RouteBucketThrottle
+
+
+class LoginIPThrottle(IPBucketThrottle):
+    scope = "login_ip"
+
+
+class LoginAccountThrottle(EmailBucketThrottle):
+    """Limits attempts against one email, whichever addresses they come from."""
+
+    scope = "login_account"
+
+
+class SignupIPThrottle(IPBucketThrottle):
+    scope = "signup_ip"
+
+
+class OTPRequestIPThrottle(IPBucketThrottle):
+    scope = "otp_request_ip"
+
+
+class OTPRequestAccountThrottle(EmailBucketThrottle):
+    scope = "otp_request_account"
+
+
+class OTPEmailRouteThrottle(RouteBucketThrottle):
+    """Every route that sends an OTP email draws on one bucket sized to the mail quota."""
+
+    scope = "otp_email"
+
+
+class OTPVerifyIPThrottle(IPBucketThrottle):
+    scope = "otp_verify_ip"
+
+
+class OTPVerifyAccountThrottle(EmailBucketThrottle):
+    """Six-digit codes fall to guessing without a per-account cap."""
+
+    scope = "otp_verify_account"
+
+
+class ResetPasswordAccountThrottle(OTPVerifyAccountThrottle):
+
+    def get_bucket_ident(self, request, view):
+        return f"user:{view.kwargs['user_id']}"
@@ -0,0 +1,193 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.cache import is_shared
+from .revocation import is_token_revoked, revoke_token
+
+# User state copied into every token, enough to authorize most requests without a query.
+CLAIM_FIELDS = ("role", "is_active", "is_staff", "is_superuser", "onboarding_flags")
+
+PRINCIPAL_KEY = "auth:principal:{user_id}"
+LOCAL_CACHE_MAX_ENTRIES = 10000
+
+
+def claims_for(user):
+    profile = getattr(user, "profile", None)
+    claims = {field: getattr(user, field) for field in CLAIM_FIELDS}
+    claims["tier"] = profile.tier if profile else "tier_1"
+    return claims
+
+
+def tokens_for_user(user):
+    refresh = RefreshToken.for_user(user)
+    for claim, value in claims_for(user).items():
+        refresh[claim] = value
+    return refresh
+
+
+class _LocalCache:
+    """A few seconds of per-process memory in front of the shared cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            if len(self.entries) >= LOCAL_CACHE_MAX_ENTRIES:
+                self.entries.clear()
+            self.entries[key] = (time.monotonic() + settings.AUTH_LOCAL_CACHE_SECONDS, value)
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+
+_local = _LocalCache()
+
+
+def current_principal(user_id):
+    """
+    The user's state recorded since their oldest live token was issued, or None when
+    nothing changed and the token's own claims are current.
+    """
+    key = PRINCIPAL_KEY.format(user_id=user_id)
+    found, principal = _local.get(key)
+    if not found:
+        principal = cache.get(key)
+        _local.set(key, principal)
+    return principal
+
+
+def refresh_principals(user_ids):
+    """Snapshots changed users so tokens issued before the change stop being trusted."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    def snapshot():
+        rows = {
+            row["id"]: row
+            for row in get_user_model().objects
+            .filter(pk__in=user_ids)
+            .values("id", "profile__tier", *CLAIM_FIELDS)
+        }
+        principals = {}
+        for user_id in user_ids:
+            row = rows.get(user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id)))
+            if row is None:
+                principals[PRINCIPAL_KEY.format(user_id=user_id)] = {"deleted": True}
+                continue
+            principal = {field: row[field] for field in CLAIM_FIELDS}
+            principal["tier"] = row["profile__tier"] or "tier_1"
+            principals[PRINCIPAL_KEY.format(user_id=user_id)] = principal
+        # Refresh re-stamps claims from the database, so no token older than one
+        # access lifetime can still carry the stale state.
+        cache.set_many(principals, int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()))
+        _local.discard(principals)
+
+    transaction.on_commit(snapshot)
+
+
+def user_from_claims(user_id, claims):
+    """
+    A User instance built without a query. Fields outside the claims are deferred,
+    so reading one (request.user.email) loads it on first access.
+    """
+    User = get_user_model()
+    values = {"id": uuid.UUID(str(user_id)), **{field: claims[field] for field in CLAIM_FIELDS}}
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    user = User.from_db(DEFAULT_DB_ALIAS, fields, [values[field] for field in fields])
+    user.tier = claims["tier"]
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Authenticates from the access token's claims instead of loading the user row.
+    That relies on principals in a cache every process shares; with per-process
+    memory each request loads the row instead.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        # A Bloom-filter miss answers in memory, so unrevoked tokens cost no round trip.
+        if is_token_revoked(token):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not is_shared():
+            # Deactivations and demotions recorded by another process would never
+            # reach this one's principals, so the claims alone can't be trusted.
+            return super().get_user(validated_token)
+
+        principal = current_principal(user_id)
+        if principal is None:
+            if any(claim not in validated_token for claim in CLAIM_FIELDS):
+                # Issued before claims were added; fall back to the row.
+                return super().get_user(validated_token)
+            principal = {claim: validated_token[claim] for claim in (*CLAIM_FIELDS, "tier")}
+        elif principal.get("deleted"):
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not principal["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user_from_claims(user_id, principal)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Re-stamps the claims on refresh from the row the parent already loads."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        # Strict: with the revocation store down, refusing (503) beats letting a
+        # logged-out or already rotated refresh token through.
+        if is_token_revoked(refresh, strict=True):
+            raise InvalidToken(_("Token has been revoked"))
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = (
+            get_user_model().objects.select_related("profile")
+            .filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        )
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        for claim, value in claims_for(user).items():
+            refresh[claim] = value
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # Revoking is check-and-set, so two concurrent refreshes of one token
+            # cannot both succeed.
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revoke_token(refresh, strict=True):
+                raise InvalidToken(_("Token has been revoked"))
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
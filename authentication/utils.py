@@ -1,16 +1,17 @@
 from datetime import timedelta
 
+from django.db.models import Q
 from django.utils import timezone
-from twilio.rest import Client
 import logging
 import random
 from django.core.mail import send_mail
 from django.conf import settings
 import os
-import sib_api_v3_sdk
-from sib_api_v3_sdk.rest import ApiException
 import random
 
+from core.exceptions import ProviderError
+from core.http import get_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,41 +24,58 @@ def generate_otp():
 otp_storage = {}
 
 
-def send_email_otp(user):
-
-    otp = str(random.randint(100000, 999999))
-
-    user.set_email_otp(otp)
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = os.getenv("BREVO_API_KEY")
-
-    api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
-
-    send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
-        to=[{"email": user.email, "name": user.first_name}],
-        sender={"email": "ettribe.errands@gmail.com", "name": "Errand Tribe"},
-        subject="Your OTP Code",
-        html_content=f"""
+def _otp_email(user, otp):
+    return {
+        "to": [{"email": user.email, "name": user.first_name}],
+        "sender": {"email": "ettribe.errands@gmail.com", "name": "Errand Tribe"},
+        "subject": "Your OTP Code",
+        "htmlContent": f"""
                 <p>Hi {user.first_name},</p>
                 <p>Your OTP code is: <b>{otp}</b></p>
                 <p>It will expire in 30 minutes.</p>
             """,
-    )
+    }
+
 
+def _brevo_headers():
+    return {"api-key": os.getenv("BREVO_API_KEY") or "", "accept": "application/json"}
+
+
+# A duplicate OTP email is harmless while a lost one blocks signup, so these
+# sends are retried even though they are POSTs.
+def send_email_otp(user):
+
+    otp = str(random.randint(100000, 999999))
+
+    user.set_email_otp(otp)
     try:
-        api_instance.send_transac_email(send_smtp_email)
+        get_client("brevo").request(
+            "POST", f"{settings.BREVO_API_URL}/smtp/email",
+            json=_otp_email(user, otp), headers=_brevo_headers(), idempotent=True,
+        )
         return otp
-    except ApiException as e:
+    except ProviderError as e:
         raise Exception(f"Failed to send OTP: {e}")
 
 
+def send_sms(to, body):
+    sid = settings.TWILIO_ACCOUNT_SID
+    return get_client("twilio").request(
+        "POST", f"{settings.TWILIO_API_URL}/2010-04-01/Accounts/{sid}/Messages.json",
+        data={"To": str(to), "From": settings.TWILIO_PHONE_NUMBER, "Body": body},
+        auth=(sid, settings.TWILIO_AUTH_TOKEN),
+    )
 
 
 def send_sms_otp(user):
     otp = generate_otp()
     user.set_sms_otp(otp)
 
-    print(f"Your Errand App verification code is: {otp} to {user.phone_number} . This code expires in 10 minutes.")
+    message = f"Your Errand App verification code is: {otp}. This code expires in 10 minutes."
+    if settings.TWILIO_ACCOUNT_SID:
+        send_sms(user.phone_number, message)
+    else:
+        print(f"Your Errand App verification code is: {otp} to {user.phone_number} . This code expires in 10 minutes.")
 
     return otp
 
@@ -72,3 +90,19 @@ def is_token_expired(token_expires):
     if not token_expires:
         return True
     return timezone.now() > token_expires
+
+
+def touch_last_login(user):
+    """
+    Records a login at most once per LAST_LOGIN_UPDATE_INTERVAL. The age check is part
+    of the UPDATE, so concurrent logins of one account still write a single row once.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.LAST_LOGIN_UPDATE_INTERVAL)
+    if user.last_login and user.last_login > stale:
+        return False
+    updated = type(user).objects.filter(
+        Q(last_login__isnull=True) | Q(last_login__lte=stale), pk=user.pk
+    ).update(last_login=now)
+    user.last_login = now
+    return bool(updated)
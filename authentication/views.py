@@ -1,26 +1,50 @@
 import datetime
 import random
+
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
 from django.utils import timezone
 
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status, permissions, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 
 from . import serializers
-from .models import TermsAndCondition
-from .utils import send_email_otp as send_otp_util
-from ErrandTribe import settings
+from .models import TermsAndCondition, Onboarding
+from .throttles import (
+    LoginAccountThrottle,
+    LoginIPThrottle,
+    OTPEmailRouteThrottle,
+    OTPRequestAccountThrottle,
+    OTPRequestIPThrottle,
+    OTPVerifyAccountThrottle,
+    OTPVerifyIPThrottle,
+    ResetPasswordAccountThrottle,
+    SignupIPThrottle,
+)
+from . import tasks
+from .payments import check_verification, credit_user_wallet, flutterwave_verify_request
+from .revocation import revoke_token
+from .tokens import tokens_for_user
+from .utils import send_email_otp as send_otp_util, touch_last_login
+from core.exceptions import ProviderError
+from core.jobs import enqueue
+from core.tasks import normalize_image
+from core.http import get_async_client
+from django.conf import settings
 from .serializers import (
     SignupSerializer,
     PasswordSerializer,
     LoginSerializer,
+    LogoutSerializer,
     EmailOTPSerializer,
     IdentityVerificationSerializer,
     UploadPictureSerializer,
@@ -30,14 +54,13 @@ from .serializers import (
 from decimal import Decimal
 
 import os
-import requests
 from django.shortcuts import get_object_or_404
 
 User = get_user_model()
 
 
 def generate_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = tokens_for_user(user)
     return {"refresh": str(refresh), "access": str(refresh.access_token)}
 
 
@@ -51,14 +74,15 @@ def get_started(request):
     request_body=SignupSerializer,
     responses={201: "User created", 400:"Validation error"},
 )
-@api_view(["POST"])
+@async_api_view(["POST"])
 @permission_classes([AllowAny])
-def signup(request):
+@throttle_classes([SignupIPThrottle, OTPEmailRouteThrottle])
+async def signup(request):
     serializer = SignupSerializer(data=request.data)
-    if serializer.is_valid():
-        user = serializer.save()
+    if await sync_to_async(serializer.is_valid)():
+        user = await sync_to_async(serializer.save)()
         try:
-            otp = send_otp_util(user)
+            await sync_to_async(enqueue)(tasks.deliver_email_otp, str(user.id))
 
             return Response(
                 {
@@ -117,30 +141,23 @@ def create_password(request, user_id):
 @swagger_auto_schema(
     method="post",
     request_body=LoginSerializer,
-    responses={200: "Login successful", 403: "Email not verified", 400: "Invalid credentials"},
+    responses={
+        200: "Login successful", 403: "Email not verified", 400: "Invalid credentials", 429: "Too many attempts",
+    },
 )
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginAccountThrottle])
 def login_view(request):
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data["user"]
 
-        steps = [
-            ("is_email_verified", "Verify your email"),
-            ("is_identity_verified", "Verify your identity"),
-            ("has_uploaded_picture", "Upload your profile picture"),
-            ("has_enabled_location", "Enable location"),
-            # ("has_withdrawal_method", "Add a withdrawal method"),
-            # ("has_funded_wallet", "Fund your wallet"),
-        ]
-
-        for field, message in steps:
-            if not getattr(user, field, False):
+        for flag, message in Onboarding.LOGIN_STEPS:
+            if not user.has_onboarded(flag):
                 return Response({"success": False, "error": message}, status=403)
 
-        user.last_login = timezone.now()
-        user.save(update_fields=["last_login"])
+        touch_last_login(user)
 
         tokens = generate_tokens_for_user(user)
 
@@ -160,6 +177,7 @@ def login_view(request):
                     "phone": user.phone_number,
                     "role": user.role if hasattr(user, "role") else None,
                     "profile_photo": profile_photo_url,
+                    "onboarding_flags": user.onboarding_flags,
                 },
                 "tokens": tokens,
             },
@@ -174,6 +192,28 @@ def login_view(request):
         status=400,
     )
 
+@swagger_auto_schema(
+    method="post",
+    request_body=LogoutSerializer,
+    responses={200: "Logged out", 400: "Invalid token"},
+)
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def logout_view(request):
+    serializer = LogoutSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"success": False, "errors": serializer.errors}, status=400)
+    try:
+        refresh = RefreshToken(serializer.validated_data["refresh"])
+    except TokenError as exc:
+        return Response({"success": False, "error": str(exc)}, status=400)
+
+    revoke_token(refresh)
+    # The access token in hand would otherwise stay valid until it expires.
+    if request.auth is not None:
+        revoke_token(request.auth)
+    return Response({"success": True, "message": "Logged out"}, status=200)
+
 @swagger_auto_schema(
     method="post",
     request_body=EmailOTPSerializer,
@@ -181,6 +221,7 @@ def login_view(request):
 )
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([OTPRequestIPThrottle, OTPRequestAccountThrottle, OTPEmailRouteThrottle])
 def forgot_password(request):
     serializer = EmailOTPSerializer(data=request.data)
     if serializer.is_valid():
@@ -202,6 +243,7 @@ def forgot_password(request):
 )
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([OTPVerifyIPThrottle, ResetPasswordAccountThrottle])
 def reset_password(request, user_id):
     otp = request.data.get("otp")
     serializer = PasswordSerializer(data=request.data)
@@ -224,10 +266,12 @@ def reset_password(request, user_id):
         200: "OTP resent successfully",
         404: "User not found",
         400: "Validation error",
+        429: "Too many requests",
     },
 )
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([OTPRequestIPThrottle, OTPRequestAccountThrottle, OTPEmailRouteThrottle])
 def resend_email_otp(request):
 
     serializer = EmailOTPSerializer(data=request.data)
@@ -256,6 +300,7 @@ def resend_email_otp(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([OTPVerifyIPThrottle, OTPVerifyAccountThrottle])
 def verify_email_otp(request):
     serializer = EmailOTPSerializer(data=request.data)
     if serializer.is_valid():
@@ -276,11 +321,9 @@ def verify_otp(user, otp: str) -> bool:
     if not user.email_otp or  user.email_otp != str(otp):
         return False
 
-    if user.email_otp_created_at < timezone.now() - datetime.timedelta(minutes=30):
+    if user.email_otp_created_at < timezone.now() - datetime.timedelta(minutes=settings.EMAIL_OTP_LIFETIME_MINUTES):
         return False
-    user.is_email_verified = True
-    user.email_otp = None
-    user.save(update_fields=["is_email_verified", "email_otp"])
+    user.mark_onboarded(Onboarding.EMAIL_VERIFIED, email_otp=None)
     return True
 
 DOCUMENT_TYPES_BY_COUNTRY = {
@@ -339,8 +382,7 @@ class VerifyIdentityView(APIView):
         serializer = IdentityVerificationSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save(user=user)
-            user.is_identity_verified = True
-            user.save(update_fields=["is_identity_verified"])
+            user.mark_onboarded(Onboarding.IDENTITY_VERIFIED)
             return Response({"message": "Verification submitted"}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -366,8 +408,8 @@ class UploadPictureView(APIView):
             if serializer.instance.profile_picture:
                 profile_picture_url = request.build_absolute_uri(serializer.instance.profile_picture.url)
 
-            user.has_uploaded_picture = True
-            user.save(update_fields=["has_uploaded_picture"])
+            user.mark_onboarded(Onboarding.PICTURE_UPLOADED)
+            enqueue(normalize_image, "authentication.User", str(user.pk), "profile_picture")
             return Response({
                 "success": True,
                 "message": "Profile picture uploaded successfully",
@@ -395,8 +437,7 @@ class LocationPermissionView(APIView):
             serializer.save(location_permission=serializer.validated_data["location_permission"])
 
             if serializer.validated_data.get("location_permission"):
-                user.has_enabled_location = True
-                user.save(update_fields=["has_enabled_location"])
+                user.mark_onboarded(Onboarding.LOCATION_ENABLED)
 
                 return Response({
                     "success": True,
@@ -587,12 +628,12 @@ class LocationPermissionView(APIView):
         400: openapi.Response(description="Validation error")
     }
 )
-@api_view(["POST"])
+@async_api_view(["POST"])
 @permission_classes([AllowAny])
-def create_flutterwave_payment(request):
+async def create_flutterwave_payment(request):
 
     FLW_SECRET_KEY = os.environ.get("FLW_SECRET_KEY")
-    url = "https://api.flutterwave.com/v3/payments"
+    url = f"{settings.FLUTTERWAVE_BASE_URL}/v3/payments"
 
     amount = request.data.get("amount")
     currency = request.data.get("currency", "NGN")
@@ -621,14 +662,16 @@ def create_flutterwave_payment(request):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
+        # Flutterwave de-duplicates on tx_ref, so a retried create is safe.
+        response = await get_async_client("flutterwave").request(
+            "POST", url, json=payload, headers=headers, idempotent=True
+        )
         data = response.json()
         return Response({
             "message": "Payment link created successfully",
             "payment_link": data.get("data", {}).get("link")
         }, status=200)
-    except requests.RequestException as e:
+    except ProviderError as e:
         return Response({"detail": "Failed to create payment", "error": str(e)}, status=502)
 
 
@@ -646,14 +689,14 @@ def create_flutterwave_payment(request):
     ),
     responses={
         200: openapi.Response(description="Wallet credited successfully"),
+        202: openapi.Response(description="Provider unavailable, verification queued"),
         400: openapi.Response(description="Verification failed or invalid transaction"),
         404: openapi.Response(description="User not found")
     }
 )
-@api_view(["POST"])
+@async_api_view(["POST"])
 @permission_classes([AllowAny])
-def verify_flutterwave_payment(request):
-    FLW_SECRET_KEY = os.environ.get("FLW_SECRET_KEY")
+async def verify_flutterwave_payment(request):
     transaction_id = request.data.get("transaction_id")
     user_id = request.data.get("user_id")
     expected_amount = request.data.get("expected_amount")
@@ -661,39 +704,31 @@ def verify_flutterwave_payment(request):
     if not all([transaction_id, user_id, expected_amount]):
         return Response({"detail": "Missing required fields"}, status=400)
 
-    url = f"https://api.flutterwave.com/v3/transactions/{transaction_id}/verify"
-    headers = {"Authorization": f"Bearer {FLW_SECRET_KEY}"}
+    url, headers = flutterwave_verify_request(transaction_id)
 
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        return Response({"detail": "Failed to contact payment provider", "error": str(e)}, status=502)
-
-    if data.get("status") != "success":
-        return Response({"detail": "Verification failed", "raw": data}, status=400)
-
-    tx_data = data.get("data", {})
-    if tx_data.get("status") != "successful":
-        return Response({"detail": "Transaction not successful"}, status=400)
-
-    charged_amount = Decimal(str(tx_data.get("amount")))
-    expected_amount = Decimal(str(expected_amount))
+        data = (await get_async_client("flutterwave").request("GET", url, headers=headers)).json()
+    except ProviderError as e:
+        # The customer has paid; keep verifying in the background rather than drop it.
+        await sync_to_async(enqueue)(
+            tasks.verify_flutterwave_payment, transaction_id, str(user_id), str(expected_amount)
+        )
+        return Response({"detail": "Payment provider unavailable; verification queued", "error": str(e)}, status=202)
 
-    if charged_amount < expected_amount:
-        return Response({"detail": "Charged amount less than expected"}, status=400)
+    error, charged_amount, tx_ref = check_verification(data, expected_amount)
+    if error:
+        body = {"detail": error}
+        if error == "Verification failed":
+            body["raw"] = data
+        return Response(body, status=400)
 
-    user = get_object_or_404(User, id=user_id)
-    user.wallet_balance = (user.wallet_balance or Decimal("0.00")) + charged_amount
-    user.has_funded_wallet = True
-    user.save(update_fields=["wallet_balance", "has_funded_wallet"])
+    user = await sync_to_async(credit_user_wallet)(user_id, charged_amount, tx_ref)
 
     return Response({
         "message": "Wallet funded successfully",
         "credited_amount": str(charged_amount),
         "new_balance": str(user.wallet_balance),
-        "transaction_ref": tx_data.get("tx_ref")
+        "transaction_ref": tx_ref
     }, status=200)
 
 
@@ -717,6 +752,7 @@ class TermsAndConditionView(APIView):
                 "accepted_at": timezone.now(),
             },
         )
+        user.mark_onboarded(Onboarding.TERMS_ACCEPTED)
         return Response(
             {
                 "success": True,
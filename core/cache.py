@@ -0,0 +1,11 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared(alias="default"):
+    """
+    Whether writes to the cache reach every process. LocMemCache (DEBUG without
+    CACHE_URL) holds within one, so invalidations from the outbox relay or Celery
+    never arrive and nothing correctness-critical should be served from it.
+    """
+    return not isinstance(caches[alias], LocMemCache)
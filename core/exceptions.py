@@ -0,0 +1,11 @@
+class ProviderError(Exception):
+    """An outbound call to a third-party provider failed."""
+
+    def __init__(self, provider, message, status=None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+
+
+class CircuitOpen(ProviderError):
+    """The provider's circuit breaker is open, so the call was not attempted."""
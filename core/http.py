@@ -0,0 +1,258 @@
+import asyncio
+import json
+import random
+import threading
+import time
+
+import aiohttp
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .exceptions import CircuitOpen, ProviderError
+from .metrics import registry
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def provider_config(name):
+    config = {
+        "pool_size": settings.OUTBOUND_HTTP_POOL_SIZE,
+        "timeout": settings.OUTBOUND_HTTP_TIMEOUT,
+        "connect_timeout": settings.OUTBOUND_HTTP_CONNECT_TIMEOUT,
+        "retries": settings.OUTBOUND_HTTP_RETRIES,
+        "backoff": settings.OUTBOUND_HTTP_BACKOFF,
+        "breaker_failures": settings.OUTBOUND_BREAKER_FAILURES,
+        "breaker_reset": settings.OUTBOUND_BREAKER_RESET_SECONDS,
+    }
+    config.update(settings.OUTBOUND_PROVIDERS.get(name, {}))
+    return config
+
+
+def backoff_delay(attempt, base, cap=5.0):
+    # Full jitter: concurrent callers retrying the same outage spread out
+    # instead of hitting the provider again in lockstep.
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after consecutive failures, then lets a single probe
+    through once the reset timeout passes. Shared by the sync and async clients.
+    """
+
+    def __init__(self, name, failures, reset_timeout):
+        self.name = name
+        self.threshold = failures
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def before_call(self):
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._report()
+                return
+        registry.inc("provider_short_circuited_total", provider=self.name)
+        raise CircuitOpen(self.name, "circuit open, call skipped")
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self._report()
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                if self.state != OPEN:
+                    registry.inc("provider_circuit_opened_total", provider=self.name)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._report()
+
+    def _report(self):
+        registry.set("provider_circuit_open", int(self.state != CLOSED), provider=self.name)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(name, config):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, config["breaker_failures"], config["breaker_reset"])
+        return _breakers[name]
+
+
+class ProviderResponse:
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body or b"null")
+
+
+class BaseProviderClient:
+
+    def __init__(self, name):
+        self.name = name
+        self.config = provider_config(name)
+        self.breaker = breaker_for(name, self.config)
+
+    def is_retryable(self, method, idempotent):
+        return method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+
+    def record(self, started, outcome):
+        registry.observe("provider_latency_seconds", time.monotonic() - started, provider=self.name)
+        registry.inc("provider_requests_total", provider=self.name, outcome=outcome)
+
+    def settle(self, status, error, started):
+        """Accounts for one attempt: None on success, else (error, whether it is transient)."""
+        if status is not None and status < 400:
+            self.breaker.record_success()
+            self.record(started, "ok")
+            return None
+        if status is not None and status not in RETRYABLE_STATUSES:
+            # The provider answered; a 4xx is our problem, not an outage.
+            self.breaker.record_success()
+            self.record(started, "client_error")
+            return ProviderError(self.name, f"HTTP {status}", status), False
+        self.breaker.record_failure()
+        self.record(started, "error")
+        return ProviderError(self.name, error or f"HTTP {status}", status), True
+
+    def abandon(self, started):
+        # An attempt that ends in anything else (cancelled by a disconnecting
+        # client, a bug) still counts as failed; otherwise a half-open breaker
+        # would wait forever for the outcome of its one probe.
+        self.breaker.record_failure()
+        self.record(started, "aborted")
+
+
+class ProviderClient(BaseProviderClient):
+    """Blocking client with a keep-alive connection pool per provider."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.config["pool_size"], max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        kwargs.setdefault("timeout", (self.config["connect_timeout"], self.config["timeout"]))
+        retryable = self.is_retryable(method, idempotent)
+
+        for attempt in range(self.config["retries"] + 1):
+            self.breaker.before_call()
+            started = time.monotonic()
+            status, error, response = None, None, None
+            try:
+                response = self.session.request(method, url, **kwargs)
+                status = response.status_code
+            except requests.RequestException as e:
+                error = str(e)
+            except BaseException:
+                self.abandon(started)
+                raise
+
+            outcome = self.settle(status, error, started)
+            if outcome is None:
+                return ProviderResponse(status, response.headers, response.content)
+            exception, transient = outcome
+            if not (transient and retryable) or attempt == self.config["retries"]:
+                raise exception
+            registry.inc("provider_retries_total", provider=self.name)
+            time.sleep(backoff_delay(attempt, self.config["backoff"]))
+
+
+class AsyncProviderClient(BaseProviderClient):
+    """aiohttp client with one keep-alive pool per provider and event loop."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.sessions = {}
+
+    def session(self):
+        loop = asyncio.get_running_loop()
+        session = self.sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.config["pool_size"], ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(
+                    total=self.config["timeout"], connect=self.config["connect_timeout"]
+                ),
+            )
+            self.sessions[loop] = session
+            for stale in [other for other in self.sessions if other.is_closed()]:
+                self.sessions.pop(stale, None)
+        return session
+
+    async def close(self):
+        session = self.sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    async def request(self, method, url, idempotent=None, **kwargs):
+        retryable = self.is_retryable(method, idempotent)
+
+        for attempt in range(self.config["retries"] + 1):
+            self.breaker.before_call()
+            started = time.monotonic()
+            status, error, headers, body = None, None, None, b""
+            try:
+                async with self.session().request(method, url, **kwargs) as response:
+                    status, headers, body = response.status, response.headers, await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+            except BaseException:
+                self.abandon(started)
+                raise
+
+            outcome = self.settle(status, error, started)
+            if outcome is None:
+                return ProviderResponse(status, headers, body)
+            exception, transient = outcome
+            if not (transient and retryable) or attempt == self.config["retries"]:
+                raise exception
+            registry.inc("provider_retries_total", provider=self.name)
+            await asyncio.sleep(backoff_delay(attempt, self.config["backoff"]))
+
+
+_clients = {}
+_async_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(name):
+    with _lock:
+        if name not in _clients:
+            _clients[name] = ProviderClient(name)
+        return _clients[name]
+
+
+def get_async_client(name):
+    with _lock:
+        if name not in _async_clients:
+            _async_clients[name] = AsyncProviderClient(name)
+        return _async_clients[name]
+
+
+async def close_async_sessions():
+    for client in list(_async_clients.values()):
+        await client.close()
@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+
+from celery import Task, shared_task
+from celery.signals import before_task_publish, task_failure, task_postrun, task_prerun, task_retry
+from django.db import transaction
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# In priority order: a worker consuming several of them drains earlier ones first.
+PAYMENTS = "payments"
+NOTIFICATIONS = "notifications"
+DEFAULT = "default"
+MEDIA = "media"
+ANALYTICS = "analytics"
+QUEUES = (PAYMENTS, NOTIFICATIONS, DEFAULT, MEDIA, ANALYTICS)
+
+
+class Job(Task):
+    """
+    Acknowledged only once it finishes, so a worker dying mid-run hands the job to
+    another; jobs must therefore be safe to run twice. Retries back off exponentially.
+    """
+
+    acks_late = True
+    reject_on_worker_lost = True
+    max_retries = 5
+    retry_backoff = True
+    retry_backoff_max = 600
+    retry_jitter = True
+
+
+def job(queue=DEFAULT, **options):
+    return shared_task(base=Job, queue=queue, **options)
+
+
+def enqueue(task, *args, **kwargs):
+    """Sends a job once the caller's transaction commits, so it never sees uncommitted rows."""
+    transaction.on_commit(lambda: task.delay(*args, **kwargs))
+
+
+_started = {}
+_started_lock = threading.Lock()
+
+
+@before_task_publish.connect
+def _count_published(sender=None, **kwargs):
+    registry.inc("jobs_published_total", task=sender)
+
+
+@task_prerun.connect
+def _start_timer(task_id=None, **kwargs):
+    with _started_lock:
+        _started[task_id] = time.monotonic()
+
+
+@task_postrun.connect
+def _record_run(task_id=None, task=None, state=None, **kwargs):
+    with _started_lock:
+        started = _started.pop(task_id, None)
+    registry.inc("jobs_total", task=task.name, state=state or "UNKNOWN")
+    if started is not None:
+        registry.observe("job_seconds", time.monotonic() - started, task=task.name)
+
+
+@task_retry.connect
+def _count_retry(sender=None, reason=None, **kwargs):
+    registry.inc("job_retries_total", task=sender.name)
+    logger.warning("Retrying %s: %s", sender.name, reason)
+
+
+@task_failure.connect
+def _log_failure(sender=None, task_id=None, exception=None, **kwargs):
+    logger.error("Job %s[%s] failed: %r", sender.name, task_id, exception)
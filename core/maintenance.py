@@ -0,0 +1,95 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import partitions
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_steps = {}
+
+
+def step(name):
+    """Registers a maintenance step: a function taking the batch size and returning rows changed."""
+
+    def decorator(func):
+        _steps[name] = func
+        return func
+
+    return decorator
+
+
+def steps():
+    autodiscover_modules("maintenance")
+    return dict(_steps)
+
+
+def update_in_batches(queryset, batch_size=None, **values):
+    """
+    Applies ``values`` to every row of ``queryset`` as a series of single UPDATE
+    statements of at most ``batch_size`` rows, each committed on its own so no
+    lock is held for long. The update must take rows out of the queryset, or
+    this never finishes. The queryset's filter is part of each UPDATE, so a row
+    changed since it was picked is left alone.
+    """
+    batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+    total = 0
+    while True:
+        batch = queryset.order_by().values("pk")[:batch_size]
+        updated = queryset.filter(pk__in=batch).update(**values)
+        total += updated
+        if updated < batch_size:
+            return total
+        time.sleep(settings.MAINTENANCE_BATCH_PAUSE_SECONDS)
+
+
+def archive_in_batches(queryset, archive_model, batch_size=None):
+    """
+    Moves every row of ``queryset`` into ``archive_model``, whose fields are the
+    source's plus ``archived_at``, in transactions of at most ``batch_size`` rows:
+    each copies its rows over and deletes them from the source together. Rows
+    locked by a request are skipped and picked up on a later run. Partitions the
+    rows fall into are created first.
+    """
+    batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+    fields = [field.attname for field in archive_model._meta.concrete_fields if field.name != "archived_at"]
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.order_by().select_for_update(skip_locked=True, of=("self",))[:batch_size].values(*fields)
+            )
+            if not rows:
+                return total
+            partitions.ensure_partitions(archive_model._meta.db_table, [row["created_at"] for row in rows])
+            archived_at = timezone.now()
+            archive_model.objects.bulk_create(
+                [archive_model(archived_at=archived_at, **row) for row in rows], ignore_conflicts=True
+            )
+            queryset.model.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
+        time.sleep(settings.MAINTENANCE_BATCH_PAUSE_SECONDS)
+
+
+def run(names=None, batch_size=None):
+    results = {}
+    for name, func in steps().items():
+        if names and name not in names:
+            continue
+        started = time.monotonic()
+        try:
+            results[name] = func(batch_size or settings.MAINTENANCE_BATCH_SIZE)
+        except Exception:
+            logger.exception("Maintenance step %s failed", name)
+            registry.inc("maintenance_failures_total", step=name)
+            continue
+        registry.inc("maintenance_rows_total", results[name], step=name)
+        registry.observe("maintenance_seconds", time.monotonic() - started, step=name)
+    return results
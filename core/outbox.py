@@ -0,0 +1,144 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .metrics import registry
+from .models import OutboxEvent, ProcessedEvent
+
+logger = logging.getLogger(__name__)
+
+_handlers = defaultdict(dict)
+
+
+def handler(*topics, name=None):
+    """Registers a function to receive every event of the given topics."""
+
+    def decorator(func):
+        for topic in topics:
+            _handlers[topic][name or f"{func.__module__}.{func.__qualname__}"] = func
+        return func
+
+    return decorator
+
+
+def handlers_for(topic):
+    return _handlers.get(topic, {})
+
+
+def emit(topic, payload=None, aggregate=None):
+    """
+    Records an event in the caller's transaction. It is delivered only if that
+    transaction commits, and at least once after it does. Outside transaction.atomic()
+    the event would commit apart from the change it describes, so that is an error.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise transaction.TransactionManagementError(
+            f"outbox.emit({topic!r}) must run inside transaction.atomic() with the write it describes."
+        )
+    return OutboxEvent.objects.create(
+        topic=topic,
+        payload=payload or {},
+        aggregate_type=type(aggregate).__name__ if aggregate is not None else "",
+        aggregate_id=str(aggregate.pk) if aggregate is not None else "",
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_CAP_SECONDS, 2 ** attempts))
+
+
+def _deliver(event, done):
+    error = None
+    for name, func in handlers_for(event.topic).items():
+        if (event.pk, name) in done:
+            continue
+        try:
+            # The handler's writes and its processed marker commit together, so a
+            # redelivered event only re-runs the handlers that did not finish.
+            with transaction.atomic():
+                func(event)
+                ProcessedEvent.objects.create(event=event, handler=name)
+        except Exception as e:
+            logger.exception("Outbox handler %s failed for event %s", name, event.pk)
+            registry.inc("outbox_handler_failures_total", handler=name)
+            error = f"{name}: {e}"
+    return error
+
+
+def drain(batch_size=None):
+    """Delivers one batch of due events; returns how many were handled."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    started = time.monotonic()
+
+    with transaction.atomic():
+        # skip_locked lets several relay workers drain the table side by side.
+        events = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutboxEvent.Status.PENDING, available_at__lte=timezone.now())
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        done = set(
+            ProcessedEvent.objects.filter(event__in=events).values_list("event_id", "handler")
+        )
+        now = timezone.now()
+        for event in events:
+            error = _deliver(event, done)
+            event.attempts += 1
+            if error is None:
+                event.status = OutboxEvent.Status.DONE
+                event.processed_at = now
+                event.last_error = ""
+                registry.observe("outbox_lag_seconds", (now - event.created_at).total_seconds())
+                registry.inc("outbox_events_total", topic=event.topic, outcome="done")
+            elif event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                event.status = OutboxEvent.Status.DEAD
+                event.processed_at = now
+                event.last_error = error
+                registry.inc("outbox_events_total", topic=event.topic, outcome="dead")
+            else:
+                event.available_at = now + retry_delay(event.attempts)
+                event.last_error = error
+                registry.inc("outbox_events_total", topic=event.topic, outcome="retry")
+
+        OutboxEvent.objects.bulk_update(
+            events, ["status", "attempts", "last_error", "available_at", "processed_at"]
+        )
+
+    registry.observe("outbox_batch_seconds", time.monotonic() - started)
+    return len(events)
+
+
+def stats():
+    now = timezone.now()
+    pending = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING)
+    oldest = pending.order_by("created_at").values_list("created_at", flat=True).first()
+    return {
+        "pending": pending.count(),
+        "oldest_pending_seconds": round((now - oldest).total_seconds(), 1) if oldest else 0.0,
+        "done_last_minute": OutboxEvent.objects.filter(
+            status=OutboxEvent.Status.DONE, processed_at__gte=now - timedelta(minutes=1)
+        ).count(),
+        "dead": OutboxEvent.objects.filter(status=OutboxEvent.Status.DEAD).count(),
+    }
+
+
+def relay(interval=None, batch_size=None, once=False, stop=None):
+    interval = settings.OUTBOX_POLL_SECONDS if interval is None else interval
+    total = 0
+    while stop is None or not stop():
+        handled = drain(batch_size)
+        total += handled
+        if once and not handled:
+            break
+        if not handled:
+            time.sleep(interval)
+    return total
@@ -0,0 +1,94 @@
+import datetime
+import logging
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Monthly partitions of a table are named <table>_pYYYYMM and cover [month, next month).
+PARTITION_SUFFIX = "_p%Y%m"
+
+ATTACHED_PARTITIONS_SQL = """
+SELECT child.relname
+FROM pg_inherits
+JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+WHERE parent.relname = %s
+"""
+
+
+def supported():
+    """Declarative partitioning is PostgreSQL's; elsewhere the tables are plain and these are no-ops."""
+    return connection.vendor == "postgresql"
+
+
+def month_start(value):
+    value = value.astimezone(datetime.timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, month):
+    return table + month.strftime(PARTITION_SUFFIX)
+
+
+def attached_partitions(table):
+    """Maps each attached monthly partition of ``table`` to the month it covers."""
+    with connection.cursor() as cursor:
+        cursor.execute(ATTACHED_PARTITIONS_SQL, [table])
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        try:
+            month = datetime.datetime.strptime(name[len(table):], PARTITION_SUFFIX)
+        except ValueError:
+            continue
+        partitions[name] = month.replace(tzinfo=datetime.timezone.utc)
+    return partitions
+
+
+def ensure_partitions(table, months):
+    """Creates the monthly partitions of ``table`` covering ``months`` that don't exist yet."""
+    if not supported():
+        return 0
+    existing = set(attached_partitions(table))
+    created = 0
+    with connection.cursor() as cursor:
+        for month in sorted({month_start(month) for month in months}):
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            # Bounds are generated here, never user input; DDL can't take bind parameters.
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {connection.ops.quote_name(name)} "
+                f"PARTITION OF {connection.ops.quote_name(table)} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+            created += 1
+    return created
+
+
+def detach_partitions(table, before):
+    """
+    Detaches the partitions of ``table`` whose whole month ends on or before ``before``.
+    They stay behind as ordinary tables, to be dumped and dropped; queries on ``table``
+    no longer see them.
+    """
+    if not supported():
+        return 0
+    detached = 0
+    with connection.cursor() as cursor:
+        for name, month in sorted(attached_partitions(table).items(), key=lambda item: item[1]):
+            if add_months(month, 1) > before:
+                continue
+            cursor.execute(
+                f"ALTER TABLE {connection.ops.quote_name(table)} "
+                f"DETACH PARTITION {connection.ops.quote_name(name)}"
+            )
+            logger.info("Detached partition %s from %s", name, table)
+            detached += 1
+    return detached
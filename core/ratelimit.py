@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = "ratelimit:{scope}:{ident}"
+LOCAL_MAX_BUCKETS = 100000
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Refill and take in one round trip. Redis' own clock keeps every node on the same
+# timeline; replicate_commands lets the script write after reading TIME on Redis < 5.
+TOKEN_BUCKET_SCRIPT = """
+redis.replicate_commands()
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1]) or capacity
+local at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring((1 - math.min(tokens, 1)) / rate)}
+"""
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill 10/60 tokens per second)."""
+    count, period = rate.split("/")
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+class LocalBuckets:
+    """Per-process buckets: the backend without Redis, and the fallback while it is down."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self.lock:
+            tokens, at = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            if len(self.buckets) >= LOCAL_MAX_BUCKETS and key not in self.buckets:
+                # Full buckets carry no state worth keeping; drop them first.
+                self.buckets = {
+                    bucket: state for bucket, state in self.buckets.items()
+                    if state[0] + (now - state[1]) * rate < capacity
+                }
+                if len(self.buckets) >= LOCAL_MAX_BUCKETS:
+                    self.buckets.clear()
+            self.buckets[key] = (tokens, now)
+        return allowed, (1 - min(tokens, 1)) / rate
+
+
+class RedisBuckets:
+    """
+    Buckets shared by every process. When Redis errors or times out, requests are
+    counted locally for RATELIMIT_FAILOVER_SECONDS rather than being let through.
+    """
+
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=settings.RATELIMIT_REDIS_TIMEOUT,
+            socket_connect_timeout=settings.RATELIMIT_REDIS_TIMEOUT,
+        )
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.local = LocalBuckets()
+        self.down_until = 0.0
+
+    def take(self, key, capacity, rate):
+        if time.monotonic() < self.down_until:
+            return self.local.take(key, capacity, rate)
+        try:
+            allowed, wait = self.script(keys=[key], args=[capacity, rate])
+        except self.redis.RedisError:
+            logger.warning("Rate limit backend unavailable; limiting locally", exc_info=True)
+            registry.inc("ratelimit_backend_errors_total")
+            self.down_until = time.monotonic() + settings.RATELIMIT_FAILOVER_SECONDS
+            return self.local.take(key, capacity, rate)
+        return bool(allowed), float(wait)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            url = settings.RATELIMIT_URL
+            _backend = RedisBuckets(url) if url else LocalBuckets()
+        return _backend
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle over a token bucket. The rate for ``scope`` comes from
+    DEFAULT_THROTTLE_RATES; its count is also the burst a client may spend at once.
+    Subclasses pick what a bucket belongs to with ``get_bucket_ident``.
+
+    Once one bucket rejects a request the rest are not charged for it, so list the
+    narrow buckets (IP, account) before shared ones (route) - a blocked client
+    cannot keep draining a bucket everyone else depends on.
+    """
+
+    scope = None
+
+    def __init__(self):
+        self.capacity, self.refill_rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES[self.scope])
+        self.retry_after = None
+
+    def get_bucket_ident(self, request, view):
+        raise NotImplementedError(".get_bucket_ident() must be overridden")
+
+    def allow_request(self, request, view):
+        if getattr(request, "_ratelimited", False):
+            return True
+        ident = self.get_bucket_ident(request, view)
+        if ident is None:
+            return True
+        key = BUCKET_KEY.format(scope=self.scope, ident=ident)
+        allowed, self.retry_after = get_backend().take(key, self.capacity, self.refill_rate)
+        if not allowed:
+            request._ratelimited = True
+            registry.inc("ratelimit_rejections_total", scope=self.scope)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPBucketThrottle(TokenBucketThrottle):
+    """Per client address, as trusted through REST_FRAMEWORK['NUM_PROXIES']."""
+
+    def get_bucket_ident(self, request, view):
+        return self.get_ident(request)
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    """Per user once authenticated, per IP before."""
+
+    def get_bucket_ident(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return self.get_ident(request)
+
+
+class EmailBucketThrottle(TokenBucketThrottle):
+    """Per target account, whichever addresses the requests come from."""
+
+    def get_bucket_ident(self, request, view):
+        email = str(request.data.get("email", "")).strip().lower()
+        if not email:
+            return None
+        # Keeps addresses out of the Redis key space.
+        return hashlib.blake2b(email.encode(), digest_size=16).hexdigest()
+
+
+class RouteBucketThrottle(TokenBucketThrottle):
+    """One bucket for all callers, capping what a route may cost us in total."""
+
+    def get_bucket_ident(self, request, view):
+        return "all"
@@ -0,0 +1,46 @@
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from . import maintenance
+from .jobs import DEFAULT, MEDIA, job
+
+
+@job(MEDIA)
+def normalize_image(model_label, pk, field_name):
+    """
+    Rewrites an uploaded image as an upright JPEG no larger than IMAGE_MAX_DIMENSION,
+    dropping its metadata. Uploads are stored as sent and fixed up here, off the request.
+    The original file is kept: its URL was already handed back to the uploader.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not getattr(instance, field_name):
+        return None
+    field_file = getattr(instance, field_name)
+    original = field_file.name
+
+    with field_file.open("rb") as source:
+        image = Image.open(source)
+        if image.format == "JPEG" and max(image.size) <= settings.IMAGE_MAX_DIMENSION and not image.info.get("exif"):
+            return original
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION))
+        output = BytesIO()
+        image.convert("RGB").save(output, "JPEG", quality=settings.IMAGE_JPEG_QUALITY, optimize=True)
+
+    name = field_file.storage.save(f"{os.path.splitext(original)[0]}.jpg", ContentFile(output.getvalue()))
+    # Only swap the file in if the upload wasn't replaced while this ran.
+    if not model.objects.filter(pk=pk, **{field_name: original}).update(**{field_name: name}):
+        field_file.storage.delete(name)
+        return None
+    return name
+
+
+@job(DEFAULT)
+def run_maintenance():
+    return maintenance.run()
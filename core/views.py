@@ -0,0 +1,19 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import outbox
+from .metrics import registry
+
+
+class MetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="Process metrics",
+        operation_description="Counters, gauges and latency histograms of the serving process, plus outbox backlog. Staff only.",
+        tags=["Internal"],
+    )
+    def get(self, request):
+        return Response({**registry.snapshot(), "outbox": outbox.stats()})
@@ -0,0 +1,179 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import outbox
+from . import events, realtime
+from .escrow import hold
+from .models import Errand, ErrandApplication, ErrandFeedEntry, Escrow
+
+PENDING = "pending"
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+
+
+class ApplicationError(Exception):
+    pass
+
+
+class NotErrandOwner(ApplicationError):
+    pass
+
+
+class AlreadyDecided(ApplicationError):
+    pass
+
+
+class ErrandAlreadyAssigned(ApplicationError):
+    pass
+
+
+class ErrandClosed(ApplicationError):
+    pass
+
+
+class OwnErrand(ApplicationError):
+    pass
+
+
+class AlreadyApplied(ApplicationError):
+    pass
+
+
+def _apply_sql():
+    application_table = ErrandApplication._meta.db_table
+    errand_table = Errand._meta.db_table
+    return (
+        f"INSERT INTO {application_table} (errand_id, runner_id, offer_amount, message, status, created_at) "
+        f"SELECT id, %s, %s, %s, %s, %s FROM {errand_table} "
+        f"WHERE id = %s AND user_id <> %s AND status = %s AND deadline > %s "
+        f"ON CONFLICT (errand_id, runner_id) DO NOTHING RETURNING id"
+    )
+
+
+def apply_to_errand(errand_id, runner, offer_amount, message=""):
+    # The happy path is a single statement: the errand lookup, the owner and
+    # assignment checks and the duplicate check (via unique_errand_application)
+    # all happen inside the INSERT. Only a rejected insert pays for diagnosis.
+    now = timezone.now()
+    values = {
+        "runner": runner.pk, "offer_amount": offer_amount, "message": message,
+        "status": PENDING, "created_at": now,
+    }
+    params = [
+        ErrandApplication._meta.get_field(name).get_db_prep_save(value, connection)
+        for name, value in values.items()
+    ]
+    params += [
+        Errand._meta.pk.get_db_prep_value(errand_id, connection),
+        Errand._meta.get_field("user").get_db_prep_value(runner.pk, connection),
+        Errand.Status.OPEN.value,
+        Errand._meta.get_field("deadline").get_db_prep_value(now, connection),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(_apply_sql(), params)
+        row = cursor.fetchone()
+
+    if row is not None:
+        application = ErrandApplication(
+            id=row[0], errand_id=errand_id, runner=runner, offer_amount=offer_amount,
+            message=message, status=PENDING, created_at=now,
+        )
+        realtime.publish([realtime.errand_group(errand_id)], realtime.APPLICATION_CREATED, {
+            "application": application.id,
+            "errand": errand_id,
+            "runner": runner.pk,
+            "offer_amount": offer_amount,
+            "created_at": now,
+        })
+        return application
+
+    errand = Errand.objects.filter(pk=errand_id).values("user_id", "runner_id", "status", "deadline").first()
+    if errand is None:
+        raise Errand.DoesNotExist
+    if errand["user_id"] == runner.pk:
+        raise OwnErrand("You cannot apply to your own errand.")
+    if errand["runner_id"] is not None:
+        raise ErrandAlreadyAssigned("This errand already has an accepted runner.")
+    if errand["status"] != Errand.Status.OPEN:
+        raise ErrandClosed(f"This errand is {errand['status']}.")
+    if errand["deadline"] <= now:
+        raise ErrandClosed("This errand is past its deadline.")
+    raise AlreadyApplied("You have already applied for this errand.")
+
+
+def _locked_application(application_id, user):
+    # Locks the errand row together with the application, so concurrent accepts
+    # for any application of the same errand queue up behind the first one.
+    application = (
+        ErrandApplication.objects
+        .select_related("errand")
+        .select_for_update(of=("self", "errand"))
+        .filter(pk=application_id)
+        .first()
+    )
+    if application is None:
+        raise ErrandApplication.DoesNotExist
+    if application.errand.user_id != user.pk:
+        raise NotErrandOwner("Only the errand owner can decide on its applications.")
+    return application
+
+
+def accept_application(application_id, user):
+    with transaction.atomic():
+        application = _locked_application(application_id, user)
+        errand = application.errand
+        if errand.runner_id is not None:
+            raise ErrandAlreadyAssigned("This errand already has an accepted runner.")
+        if errand.status != Errand.Status.OPEN:
+            raise ErrandClosed(f"This errand is {errand.status}.")
+        if application.status != PENDING:
+            raise AlreadyDecided(f"Application is already {application.status}.")
+
+        # Each step is guarded by the state it expects, so even without row
+        # locks (e.g. SQLite) a second accept changes nothing and rolls back.
+        assigned = Errand.objects.filter(
+            pk=errand.pk, runner__isnull=True, status=Errand.Status.OPEN
+        ).update(runner=application.runner_id, status=Errand.Status.ASSIGNED)
+        accepted = ErrandApplication.objects.filter(pk=application.pk, status=PENDING).update(status=ACCEPTED)
+        if not assigned or not accepted:
+            raise ErrandAlreadyAssigned("This errand already has an accepted runner.")
+
+        rejected = (
+            ErrandApplication.objects
+            .filter(errand_id=errand.pk, status=PENDING)
+            .exclude(pk=application.pk)
+            .update(status=REJECTED)
+        )
+
+        errand.runner_id = application.runner_id
+        errand.status = Errand.Status.ASSIGNED
+        escrow = Escrow.objects.create(errand=errand, amount=application.offer_amount)
+        escrow = hold(escrow)
+
+        ErrandFeedEntry.objects.filter(
+            errand_type=ErrandFeedEntry.ErrandType.ERRAND, source_id=str(errand.pk)
+        ).update(status=ErrandFeedEntry.Status.ASSIGNED, updated_at=timezone.now())
+
+        outbox.emit(events.APPLICATION_ACCEPTED, {
+            "application": application.pk,
+            "errand": errand.pk,
+            "runner": str(application.runner_id),
+            "escrow": str(escrow.pk),
+        }, aggregate=errand)
+
+    application.status = ACCEPTED
+    return application, escrow, rejected
+
+
+def reject_application(application_id, user):
+    with transaction.atomic():
+        application = _locked_application(application_id, user)
+        if application.status != PENDING:
+            raise AlreadyDecided(f"Application is already {application.status}.")
+        ErrandApplication.objects.filter(pk=application.pk).update(status=REJECTED)
+        realtime.publish([realtime.user_group(application.runner_id)], realtime.APPLICATION_REJECTED, {
+            "application": application.pk, "errand": application.errand_id,
+        })
+
+    application.status = REJECTED
+    return application
@@ -6,4 +6,5 @@ class DashboardConfig(AppConfig):
     name = 'dashboard'
 
     def ready(self):
-        import dashboard.signals
\ No newline at end of file
+        import dashboard.signals
+        import dashboard.handlers
\ No newline at end of file
@@ -0,0 +1,65 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db.models import Q
+
+from .feed import location_cell
+from .models import Errand
+from .realtime import user_group, errand_group, cell_group
+
+
+@database_sync_to_async
+def can_follow_errand(user, errand_id):
+    return Errand.objects.filter(
+        Q(user=user) | Q(applications__runner=user), pk=errand_id
+    ).exists()
+
+
+class EventsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes errand events to the connected user.
+
+    Every connection joins its user group. Clients can also send
+    {"action": "follow_errand", "errand": <id>} for an errand they own or applied to,
+    and {"action": "watch_area", "latitude": .., "longitude": ..} or
+    {"action": "watch_area", "location": ".."} to hear about errands posted nearby.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.groups_joined = set()
+        await self.join(user_group(user.pk))
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group in getattr(self, "groups_joined", ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def join(self, group):
+        if group not in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.groups_joined.add(group)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action")
+        if action == "follow_errand":
+            errand_id = content.get("errand")
+            if not str(errand_id).isdigit() or not await can_follow_errand(self.scope["user"], errand_id):
+                await self.send_json({"event": "error", "data": {"detail": "Cannot follow this errand."}})
+                return
+            await self.join(errand_group(errand_id))
+        elif action == "watch_area":
+            cell = location_cell(content.get("latitude"), content.get("longitude"), content.get("location") or "")
+            if not cell:
+                await self.send_json({"event": "error", "data": {"detail": "A location is required."}})
+                return
+            await self.join(cell_group(cell))
+        else:
+            await self.send_json({"event": "error", "data": {"detail": "Unknown action."}})
+            return
+        await self.send_json({"event": "subscribed", "data": {"action": action}})
+
+    async def realtime_event(self, message):
+        await self.send_json({"event": message["event"], "data": message["data"]})
@@ -0,0 +1,179 @@
+from django.db import transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from core import outbox
+from . import events, realtime, statistics
+from .models import Errand, ErrandFeedEntry, Escrow, EscrowOperation, Task, Wallet
+from .session import invalidate_session
+
+HOLD = EscrowOperation.Action.HOLD
+RELEASE = EscrowOperation.Action.RELEASE
+REFUND = EscrowOperation.Action.REFUND
+
+# action -> (required current status, resulting status)
+TRANSITIONS = {
+    HOLD: (Escrow.Status.PENDING, Escrow.Status.HELD),
+    RELEASE: (Escrow.Status.HELD, Escrow.Status.RELEASED),
+    REFUND: (Escrow.Status.HELD, Escrow.Status.REFUNDED),
+}
+
+# Where an errand's lifecycle ends once its escrow settles.
+ERRAND_OUTCOMES = {
+    RELEASE: Errand.Status.COMPLETED,
+    REFUND: Errand.Status.CANCELLED,
+}
+
+
+class EscrowError(Exception):
+    pass
+
+
+class InvalidTransition(EscrowError):
+    pass
+
+
+class ConcurrentUpdate(EscrowError):
+    pass
+
+
+class InsufficientFunds(EscrowError):
+    pass
+
+
+def ledger_reference(escrow_id, action):
+    # Unique on Transaction.reference: a second payout for the same escrow and
+    # action fails at the database even if every other check were bypassed.
+    return f"escrow:{escrow_id}:{action}"
+
+
+def wallet_for(user_id):
+    wallet, _ = Wallet.objects.get_or_create(user_id=user_id)
+    return wallet
+
+
+def _move_funds(escrow, action):
+    reference = ledger_reference(escrow.pk, action)
+    if action == HOLD:
+        try:
+            wallet_for(escrow.payer_id).debit(
+                escrow.amount, description=f"Escrow hold for {escrow.pk}", reference=reference
+            )
+        except ValueError:
+            raise InsufficientFunds("The poster's wallet cannot cover this escrow.")
+    elif action == RELEASE:
+        if not escrow.payee_id:
+            raise InvalidTransition("Escrow has no worker to release funds to.")
+        wallet_for(escrow.payee_id).credit(
+            escrow.amount, description=f"Escrow release for {escrow.pk}", reference=reference
+        )
+    elif action == REFUND:
+        wallet_for(escrow.payer_id).credit(
+            escrow.amount, description=f"Escrow refund for {escrow.pk}", reference=reference
+        )
+
+
+def _after_transition(escrow, action, now):
+    if action == RELEASE and escrow.task_id:
+        Task.objects.filter(pk=escrow.task_id).update(
+            status=Task.Status.COMPLETED, completed_at=now, updated_at=now
+        )
+        invalidate_session([escrow.payer_id])
+    if action in ERRAND_OUTCOMES and escrow.errand_id:
+        outcome = ERRAND_OUTCOMES[action]
+        Errand.objects.filter(pk=escrow.errand_id, status=Errand.Status.ASSIGNED).update(status=outcome)
+        ErrandFeedEntry.objects.filter(
+            errand_type=ErrandFeedEntry.ErrandType.ERRAND, source_id=str(escrow.errand_id)
+        ).update(status=outcome, updated_at=now)
+    if action == RELEASE:
+        publish_released(escrow.pk, escrow.amount, escrow.payer_id, escrow.payee_id, escrow.errand_id)
+        errand_type, source_id = ("task", escrow.task_id) if escrow.task_id else ("errand", escrow.errand_id)
+        outbox.emit(events.ERRAND_COMPLETED, {"completions": [
+            statistics.completion(errand_type, source_id, escrow.payer_id, escrow.amount, escrow.payee_id),
+        ]}, aggregate=escrow)
+
+
+def publish_released(escrow_id, amount, payer_id, payee_id, errand_id=None):
+    groups = [realtime.user_group(payer_id), realtime.user_group(payee_id)]
+    if errand_id:
+        groups.append(realtime.errand_group(errand_id))
+    realtime.publish(groups, realtime.ESCROW_RELEASED, {
+        "escrow": escrow_id, "amount": amount, "errand": errand_id,
+    })
+
+
+def _replay(idempotency_key, escrow_id, action):
+    operation = EscrowOperation.objects.select_related("escrow").filter(idempotency_key=idempotency_key).first()
+    if operation is None:
+        return None
+    if operation.escrow_id != escrow_id or operation.action != action:
+        raise EscrowError("Idempotency key was already used for a different escrow operation.")
+    return operation.escrow
+
+
+def _transition(escrow, action, idempotency_key=None):
+    escrow_id = escrow.pk if isinstance(escrow, Escrow) else escrow
+    idempotency_key = idempotency_key or f"{escrow_id}:{action}"
+    required, target = TRANSITIONS[action]
+
+    try:
+        with transaction.atomic():
+            replayed = _replay(idempotency_key, escrow_id, action)
+            if replayed is not None:
+                return replayed
+
+            current = Escrow.objects.select_related("task", "errand").get(pk=escrow_id)
+            if current.status != required:
+                raise InvalidTransition(f"Cannot {action} an escrow that is {current.status}.")
+
+            # Optimistic concurrency: only the request that still sees the version
+            # it read wins; a concurrent winner makes this UPDATE match no rows.
+            now = timezone.now()
+            changes = {"status": target, "version": F("version") + 1}
+            if action == RELEASE:
+                changes["released_at"] = now
+            updated = Escrow.objects.filter(
+                pk=current.pk, status=required, version=current.version
+            ).update(**changes)
+            if not updated:
+                raise ConcurrentUpdate("Escrow was changed by another request.")
+
+            _move_funds(current, action)
+            _after_transition(current, action, now)
+            EscrowOperation.objects.create(
+                escrow=current,
+                action=action,
+                idempotency_key=idempotency_key,
+                version=current.version + 1,
+            )
+    except IntegrityError:
+        # A concurrent request with the same key or ledger reference committed first.
+        replayed = _replay(idempotency_key, escrow_id, action)
+        if replayed is not None:
+            return replayed
+        raise ConcurrentUpdate("Escrow was changed by another request.")
+
+    current.status = target
+    current.version += 1
+    if action == RELEASE:
+        current.released_at = now
+    return current
+
+
+def hold(escrow, idempotency_key=None):
+    return _transition(escrow, HOLD, idempotency_key)
+
+
+def release(escrow, idempotency_key=None):
+    return _transition(escrow, RELEASE, idempotency_key)
+
+
+def refund(escrow, idempotency_key=None):
+    return _transition(escrow, REFUND, idempotency_key)
+
+
+def complete(escrow, idempotency_key=None):
+    """Marks the escrow's task or errand done; see Task.mark_completed for when it pays out."""
+    (escrow.task if escrow.task_id else escrow.errand).mark_completed(idempotency_key=idempotency_key)
+    escrow.refresh_from_db()
+    return escrow
@@ -0,0 +1,6 @@
+# Outbox topics emitted by the errand domain; handlers live in dashboard/handlers.py.
+ERRAND_CREATED = "errand.created"
+APPLICATION_ACCEPTED = "application.accepted"
+ERRAND_COMPLETED = "errand.completed"
+REVIEW_CREATED = "review.created"
+WALLET_FUNDED = "wallet.funded"
@@ -0,0 +1,160 @@
+import csv
+import datetime
+import itertools
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Errand, ErrandApplication, ErrandApplicationArchive, Review, ReviewArchive, Transaction, \
+    TransactionArchive
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def errands_queryset(model, user, everything=False):
+    queryset = model.objects.all() if everything else model.objects.filter(user=user)
+    return queryset.values_list(
+        "id", "user_id", "title", "description", "location", "category__name",
+        "price_min", "price_max", "estimated_duration", "deadline", "created_at",
+    )
+
+
+def applications_queryset(model, user, everything=False):
+    queryset = model.objects.all()
+    if not everything:
+        queryset = queryset.filter(Q(errand__user=user) | Q(runner=user))
+    return queryset.values_list(
+        "id", "errand_id", "errand__title", "runner_id", "runner__email",
+        "offer_amount", "message", "status", "created_at",
+    )
+
+
+def reviews_queryset(model, user, everything=False):
+    queryset = model.objects.all()
+    if not everything:
+        queryset = queryset.filter(Q(reviewer=user) | Q(errand__runner=user))
+    return queryset.values_list(
+        "id", "errand_id", "errand__errand__title", "errand__runner_id", "reviewer_id",
+        "rating", "comment", "created_at",
+    )
+
+
+def transactions_queryset(model, user, everything=False):
+    queryset = model.objects.all() if everything else model.objects.filter(wallet__user=user)
+    return queryset.values_list(
+        "id", "wallet_id", "reference", "transaction_type", "amount", "description", "created_at",
+    )
+
+
+# Each dataset reads its archive table (oldest rows) and then the live one; both
+# share field names, so one queryset builder serves the two.
+EXPORTS = {
+    "errands": (
+        errands_queryset,
+        (Errand,),
+        ["id", "user_id", "title", "description", "location", "category", "price_min", "price_max",
+         "estimated_duration", "deadline", "created_at"],
+    ),
+    "applications": (
+        applications_queryset,
+        (ErrandApplicationArchive, ErrandApplication),
+        ["id", "errand_id", "errand_title", "runner_id", "runner_email", "offer_amount", "message",
+         "status", "created_at"],
+    ),
+    "reviews": (
+        reviews_queryset,
+        (ReviewArchive, Review),
+        ["id", "application_id", "errand_title", "runner_id", "reviewer_id", "rating", "comment",
+         "created_at"],
+    ),
+    "transactions": (
+        transactions_queryset,
+        (TransactionArchive, Transaction),
+        ["id", "wallet_id", "reference", "transaction_type", "amount", "description", "created_at"],
+    ),
+}
+
+
+class Echo:
+    # csv.writer only needs an object with write(); hand each line straight back.
+    def write(self, value):
+        return value
+
+
+def stream_rows(querysets):
+    # iterator() keeps a server-side cursor open on PostgreSQL, so only one chunk
+    # of rows is held in memory no matter how large the export is.
+    return itertools.chain.from_iterable(
+        queryset.order_by("pk").iterator(chunk_size=EXPORT_CHUNK_SIZE) for queryset in querysets
+    )
+
+
+def stream_csv(columns, querysets):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in stream_rows(querysets):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(columns, querysets):
+    for row in stream_rows(querysets):
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+async def in_chunks(lines):
+    """
+    Serves a blocking line generator to an async response. Under ASGI, Django
+    would otherwise drain a sync iterator into a list before sending anything;
+    here each EXPORT_CHUNK_SIZE lines are pulled on the sync thread, which keeps
+    the server-side cursor on its one connection, and sent before the next.
+    """
+    lines = iter(lines)
+    next_chunk = sync_to_async(lambda: "".join(itertools.islice(lines, EXPORT_CHUNK_SIZE)))
+    while True:
+        chunk = await next_chunk()
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_bound(value):
+    """A YYYY-MM-DD query parameter as a date; ValueError if it isn't one."""
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f"Not a date: {value}")
+    return day
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def created_between(queryset, since=None, until=None):
+    # Bounds on created_at let PostgreSQL skip archive partitions outside the range.
+    if since:
+        queryset = queryset.filter(created_at__gte=start_of_day(since))
+    if until:
+        queryset = queryset.filter(created_at__lt=start_of_day(until + datetime.timedelta(days=1)))
+    return queryset
+
+
+def export_stream(dataset, file_format, user, everything=False, since=None, until=None):
+    """Rows created from ``since`` through ``until`` (dates, both optional and inclusive)."""
+    build_queryset, models, columns = EXPORTS[dataset]
+    querysets = [
+        created_between(build_queryset(model, user, everything=everything), since, until) for model in models
+    ]
+    if file_format == "csv":
+        return in_chunks(stream_csv(columns, querysets))
+    return in_chunks(stream_ndjson(columns, querysets))
@@ -0,0 +1,204 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+
+from .models import (
+    Task, Errand, PickupDelivery, CareTask, VerificationTask, SupermarketRun, Category,
+    ErrandFeedEntry, TaskCategory,
+)
+
+FEED_FIELDS = [
+    "owner_id", "title", "category", "location", "location_cell", "latitude", "longitude",
+    "price_min", "price_max", "deadline", "status", "created_at",
+]
+
+OPEN_SOURCE_STATUSES = {"open", "pending"}
+
+
+def location_cell(latitude=None, longitude=None, location=""):
+    # Coordinates snap to a fixed grid; free-text locations fall back to their
+    # first component ("Ikeja, Lagos" -> "ikeja") so text-only errands still bucket.
+    if latitude is not None and longitude is not None:
+        size = settings.FEED_CELL_SIZE_DEGREES
+        return f"geo:{int(latitude // size)}:{int(longitude // size)}"
+    if location:
+        return f"loc:{location.split(',')[0].strip().lower()[:58]}"
+    return ""
+
+
+def _aware(day, at=None):
+    if not day:
+        return None
+    if isinstance(day, str):
+        day = parse_date(day)
+    if isinstance(at, str):
+        at = parse_time(at)
+    return timezone.make_aware(datetime.combine(day, at or time.max))
+
+
+def _status(value):
+    if not value or value in OPEN_SOURCE_STATUSES:
+        return ErrandFeedEntry.Status.OPEN
+    if value in ErrandFeedEntry.Status.values:
+        return value
+    return ErrandFeedEntry.Status.OPEN
+
+
+def _from_task(task, **kwargs):
+    return {
+        "owner_id": task.poster_id,
+        "title": task.title,
+        "category": task.category,
+        "location": task.location,
+        "location_cell": location_cell(location=task.location),
+        "price_min": task.price,
+        "price_max": task.price,
+        "status": _status(task.status),
+        "created_at": task.created_at,
+    }
+
+
+def _from_errand(errand, category_names=None):
+    if category_names is not None:
+        category = category_names.get(errand.category_id, "")
+    else:
+        category = errand.category.name if errand.category_id else ""
+    return {
+        "owner_id": errand.user_id,
+        "title": errand.title,
+        "category": category,
+        "location": errand.location,
+        "location_cell": location_cell(errand.latitude, errand.longitude, errand.location),
+        "latitude": errand.latitude,
+        "longitude": errand.longitude,
+        "price_min": errand.price_min,
+        "price_max": errand.price_max,
+        "deadline": errand.deadline,
+        "status": errand.status,
+        "created_at": errand.created_at,
+    }
+
+
+def _from_pickup_delivery(pickup, **kwargs):
+    return {
+        "owner_id": pickup.user_id,
+        "title": pickup.title,
+        "category": TaskCategory.PICKUP_DELIVERY,
+        "location": pickup.pickup_location,
+        "location_cell": location_cell(pickup.pickup_lat, pickup.pickup_lng, pickup.pickup_location),
+        "latitude": pickup.pickup_lat,
+        "longitude": pickup.pickup_lng,
+        "price_min": pickup.price_min,
+        "price_max": pickup.price_max,
+        "deadline": pickup.deadline,
+        "status": _status(pickup.status),
+        "created_at": pickup.created_at,
+    }
+
+
+def _from_care_task(care_task, **kwargs):
+    return {
+        "owner_id": care_task.user_id,
+        "title": care_task.title,
+        "category": TaskCategory.CARE_TASKS,
+        "location": care_task.location or "",
+        "location_cell": location_cell(location=care_task.location or ""),
+        "price_min": care_task.min_price,
+        "price_max": care_task.max_price,
+        "deadline": _aware(care_task.end_date),
+        "created_at": care_task.created_at,
+    }
+
+
+def _from_verification_task(verification_task, **kwargs):
+    return {
+        "owner_id": verification_task.user_id,
+        "title": verification_task.title,
+        "category": TaskCategory.VERIFY_IT,
+        "location": verification_task.location or "",
+        "location_cell": location_cell(location=verification_task.location or ""),
+        "price_min": verification_task.min_price,
+        "price_max": verification_task.max_price,
+        "deadline": _aware(verification_task.end_date),
+        "created_at": verification_task.created_at,
+    }
+
+
+def _from_supermarket_run(run, **kwargs):
+    return {
+        "title": run.title,
+        "category": TaskCategory.SUPERMARKET_RUNS,
+        "location": run.location,
+        "location_cell": location_cell(location=run.location),
+        "deadline": _aware(run.needed_by_date, run.needed_by_time),
+        "created_at": run.created_at,
+    }
+
+
+SOURCES = {
+    Task: (ErrandFeedEntry.ErrandType.TASK, _from_task),
+    Errand: (ErrandFeedEntry.ErrandType.ERRAND, _from_errand),
+    PickupDelivery: (ErrandFeedEntry.ErrandType.PICKUP_DELIVERY, _from_pickup_delivery),
+    CareTask: (ErrandFeedEntry.ErrandType.CARE_TASK, _from_care_task),
+    VerificationTask: (ErrandFeedEntry.ErrandType.VERIFICATION_TASK, _from_verification_task),
+    SupermarketRun: (ErrandFeedEntry.ErrandType.SUPERMARKET_RUN, _from_supermarket_run),
+}
+
+
+def build_entry(instance, **kwargs):
+    errand_type, adapter = SOURCES[type(instance)]
+    fields = dict.fromkeys(FEED_FIELDS)
+    fields.update(status=ErrandFeedEntry.Status.OPEN, category="", location="", location_cell="")
+    fields.update(adapter(instance, **kwargs))
+    # Agrees with the maintenance expiry, so re-syncing never reopens an overdue entry.
+    if fields["status"] == ErrandFeedEntry.Status.OPEN and fields["deadline"] and fields["deadline"] < timezone.now():
+        fields["status"] = ErrandFeedEntry.Status.EXPIRED
+    return ErrandFeedEntry(errand_type=errand_type, source_id=str(instance.pk), **fields)
+
+
+def sync_entries(model, instances):
+    instances = list(instances)
+    if not instances:
+        return []
+
+    kwargs = {}
+    if model is Errand:
+        category_ids = {errand.category_id for errand in instances if errand.category_id}
+        kwargs["category_names"] = dict(
+            Category.objects.filter(id__in=category_ids).values_list("id", "name")
+        ) if category_ids else {}
+
+    # One upsert per batch keeps every write path to a single extra statement.
+    return ErrandFeedEntry.objects.bulk_create(
+        [build_entry(instance, **kwargs) for instance in instances],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["errand_type", "source_id"],
+        update_fields=FEED_FIELDS,
+    )
+
+
+def sync_entry(instance):
+    return sync_entries(type(instance), [instance])
+
+
+def remove_entry(instance):
+    errand_type, _ = SOURCES[type(instance)]
+    ErrandFeedEntry.objects.filter(errand_type=errand_type, source_id=str(instance.pk)).delete()
+
+
+def rebuild(chunk_size=2000):
+    counts = {}
+    for model, (errand_type, _) in SOURCES.items():
+        batch, total = [], 0
+        for instance in model.objects.order_by("pk").iterator(chunk_size=chunk_size):
+            batch.append(instance)
+            if len(batch) >= chunk_size:
+                sync_entries(model, batch)
+                total += len(batch)
+                batch = []
+        sync_entries(model, batch)
+        counts[errand_type] = total + len(batch)
+    return counts
@@ -0,0 +1,85 @@
+from collections import Counter
+
+from django.db.models import Count, Sum
+
+from core.outbox import handler
+from . import events, realtime, recommendations, statistics, tiers
+from .models import ErrandFeedEntry, Review, ReviewArchive, RunnerProfile
+
+
+def _entries(event):
+    return list(ErrandFeedEntry.objects.filter(
+        errand_type=event.payload["errand_type"], source_id__in=event.payload["source_ids"]
+    ))
+
+
+@handler(events.ERRAND_CREATED)
+def notify_nearby_runners(event):
+    entries = _entries(event)
+    if entries:
+        realtime.publish([realtime.FEED_GROUP], realtime.ERRAND_POSTED, {"count": len(entries)})
+    for entry in entries:
+        if entry.location_cell:
+            realtime.publish([realtime.cell_group(entry.location_cell)], realtime.ERRAND_POSTED, {
+                "errand_type": entry.errand_type,
+                "source_id": entry.source_id,
+                "title": entry.title,
+                "category": entry.category,
+                "location": entry.location,
+                "price_min": entry.price_min,
+                "price_max": entry.price_max,
+                "deadline": entry.deadline,
+            })
+
+
+@handler(events.ERRAND_CREATED)
+def push_recommendations(event):
+    # Merging is keyed by errand id, so a redelivered event changes nothing.
+    if event.payload["errand_type"] == ErrandFeedEntry.ErrandType.ERRAND:
+        recommendations.on_errands_posted(_entries(event))
+
+
+@handler(events.ERRAND_CREATED)
+def count_posted(event):
+    statistics.record_posted(_entries(event))
+
+
+@handler(events.ERRAND_COMPLETED)
+def count_completed(event):
+    statistics.record_completed(event.payload["completions"])
+
+
+@handler(events.ERRAND_COMPLETED)
+def advance_runner_tiers(event):
+    counts = Counter(c["runner"] for c in event.payload["completions"] if c.get("runner"))
+    tiers.record_runner_completions(counts)
+
+
+@handler(events.APPLICATION_ACCEPTED)
+def notify_errand_assigned(event):
+    # Runners following the errand learn from errand.assigned whether their
+    # own application was the one accepted, so the bulk reject stays one UPDATE.
+    payload = event.payload
+    realtime.publish([realtime.user_group(payload["runner"])], realtime.APPLICATION_ACCEPTED, {
+        "application": payload["application"], "errand": payload["errand"], "escrow": payload["escrow"],
+    })
+    realtime.publish([realtime.errand_group(payload["errand"])], realtime.ERRAND_ASSIGNED, {
+        "errand": payload["errand"], "runner": payload["runner"], "application": payload["application"],
+    })
+
+
+@handler(events.REVIEW_CREATED)
+def update_runner_rating(event):
+    runner_id = event.payload["runner"]
+    # Archived reviews still count towards the rating.
+    total = count = 0
+    for model in (Review, ReviewArchive):
+        reviews = model.objects.filter(errand__runner_id=runner_id).aggregate(total=Sum("rating"), count=Count("id"))
+        total += reviews["total"] or 0
+        count += reviews["count"]
+    RunnerProfile.objects.update_or_create(user_id=runner_id, defaults={"rating": total / count if count else 0.0})
+
+
+@handler(events.WALLET_FUNDED)
+def notify_wallet_funded(event):
+    realtime.publish([realtime.user_group(event.payload["user"])], realtime.WALLET_FUNDED, event.payload)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core import partitions
+from core.maintenance import archive_in_batches, step, update_in_batches
+from .models import Errand, ErrandApplication, ErrandApplicationArchive, ErrandFeedEntry, PickupDelivery, Review, \
+    ReviewArchive, Transaction, TransactionArchive
+
+ARCHIVES = (ErrandApplicationArchive, ReviewArchive, TransactionArchive)
+
+
+@step("expire_errands")
+def expire_errands(batch_size):
+    overdue = Errand.objects.filter(status=Errand.Status.OPEN, deadline__lt=timezone.now())
+    return update_in_batches(overdue, batch_size, status=Errand.Status.EXPIRED)
+
+
+@step("expire_pickup_deliveries")
+def expire_pickup_deliveries(batch_size):
+    overdue = PickupDelivery.objects.filter(status="pending", deadline__lt=timezone.now())
+    return update_in_batches(overdue, batch_size, status="expired")
+
+
+@step("expire_feed_entries")
+def expire_feed_entries(batch_size):
+    # Covers every errand type, so the feed stops offering work whose deadline passed.
+    overdue = ErrandFeedEntry.objects.filter(status=ErrandFeedEntry.Status.OPEN, deadline__lt=timezone.now())
+    return update_in_batches(overdue, batch_size, status=ErrandFeedEntry.Status.EXPIRED, updated_at=timezone.now())
+
+
+def archive_cutoff():
+    return timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+
+
+@step("create_archive_partitions")
+def create_archive_partitions(batch_size):
+    # The months about to pass the cutoff; archiving creates any older ones it meets.
+    first = partitions.month_start(archive_cutoff())
+    months = [partitions.add_months(first, count) for count in range(settings.ARCHIVE_PARTITIONS_AHEAD + 1)]
+    return sum(partitions.ensure_partitions(model._meta.db_table, months) for model in ARCHIVES)
+
+
+@step("archive_applications")
+def archive_applications(batch_size):
+    # Losing applications on closed errands; accepted ones stay, reviews point at them.
+    settled = ErrandApplication.objects.filter(
+        created_at__lt=archive_cutoff(),
+        errand__status__in=[Errand.Status.COMPLETED, Errand.Status.CANCELLED, Errand.Status.EXPIRED],
+        review__isnull=True,
+    ).exclude(status="accepted")
+    return archive_in_batches(settled, ErrandApplicationArchive, batch_size)
+
+
+@step("archive_reviews")
+def archive_reviews(batch_size):
+    return archive_in_batches(Review.objects.filter(created_at__lt=archive_cutoff()), ReviewArchive, batch_size)
+
+
+@step("archive_transactions")
+def archive_transactions(batch_size):
+    # Balances live on the wallet, so ledger rows are history once written.
+    settled = Transaction.objects.filter(created_at__lt=archive_cutoff())
+    return archive_in_batches(settled, TransactionArchive, batch_size)
+
+
+@step("detach_archive_partitions")
+def detach_archive_partitions(batch_size):
+    if not settings.ARCHIVE_RETENTION_MONTHS:
+        return 0
+    before = partitions.add_months(partitions.month_start(timezone.now()), -settings.ARCHIVE_RETENTION_MONTHS)
+    return sum(partitions.detach_partitions(model._meta.db_table, before) for model in ARCHIVES)
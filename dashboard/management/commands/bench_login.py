@@ -0,0 +1,81 @@
+import statistics
+import time
+import uuid
+from functools import reduce
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from authentication.models import Onboarding
+
+PASSWORD = "bench-Password-123"
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+LEGACY = {
+    "PASSWORD_HASHERS": ["django.contrib.auth.hashers.PBKDF2PasswordHasher"],
+    "LAST_LOGIN_UPDATE_INTERVAL": 0,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark login_view: latency percentiles and database writes per login, for the "
+        "legacy pipeline (PBKDF2, last_login on every login) and the current one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument(
+            "--rounds", type=int, default=3,
+            help="Logins per user; keep it under the per-account login rate.",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        flags = reduce(lambda mask, step: mask | step[0], Onboarding.LOGIN_STEPS, 0)
+        legacy_hash = make_password(PASSWORD, hasher="pbkdf2_sha256")
+        users = User.objects.bulk_create([
+            User(email=f"bench-{uuid.uuid4().hex}@bench.local", password=legacy_hash, onboarding_flags=flags)
+            for _ in range(options["users"])
+        ])
+        try:
+            with override_settings(**LEGACY):
+                self.report("legacy", self.run(users, options["rounds"]))
+            # Users still hold PBKDF2 hashes, so the first round includes the one-off rehash.
+            self.report("argon2, first login (rehash)", self.run(users, 1))
+            self.report("argon2, steady state", self.run(users, options["rounds"]))
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run(self, users, rounds):
+        cache.clear()
+        client = Client()
+        latencies, writes, failures = [], 0, 0
+        for round_number in range(rounds):
+            for index, user in enumerate(users):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.monotonic()
+                    response = client.post(
+                        "/auth/login/", {"email": user.email, "password": PASSWORD},
+                        content_type="application/json", REMOTE_ADDR=f"10.0.{round_number % 250}.{index % 250}",
+                    )
+                    latencies.append(time.monotonic() - started)
+                failures += response.status_code != 200
+                writes += sum(1 for query in queries.captured_queries if query["sql"].lstrip().upper().startswith(WRITES))
+        return latencies, writes, failures
+
+    def report(self, label, result):
+        latencies, writes, failures = result
+        latencies = sorted(latencies)
+        p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+        self.stdout.write(
+            f"{label}: {len(latencies)} logins, p50 {statistics.median(latencies) * 1000:.1f}ms, "
+            f"p99 {p99 * 1000:.1f}ms, {writes / len(latencies):.2f} writes/login"
+        )
+        if failures:
+            self.stderr.write(self.style.ERROR(f"{failures} logins failed"))
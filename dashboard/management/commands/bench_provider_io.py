@@ -0,0 +1,120 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from aiohttp import web
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.test.utils import override_settings
+
+from core.http import close_async_sessions
+
+
+class FakeFlutterwave:
+    """Local stand-in for the Flutterwave API that answers after a fixed delay."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.port = None
+
+    async def create_payment(self, request):
+        await asyncio.sleep(self.latency)
+        return web.json_response({"status": "success", "data": {"link": "https://checkout.example/pay"}})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v3/payments", self.create_payment)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0, backlog=2048)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.ready.set()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.start())
+        self.loop.run_forever()
+
+    def __enter__(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        self.ready.wait()
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+PAYLOAD = {"amount": 1000, "currency": "NGN", "email": "bench@example.com", "tx_ref": "bench"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark create_flutterwave_payment against a local fake provider with simulated latency: "
+        "concurrent requests through the async view versus the same calls made by a pool of sync workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--latency-ms", type=int, default=200, help="Simulated provider latency.")
+        parser.add_argument(
+            "--sync-workers", type=int, default=4,
+            help="Size of the blocking worker pool used as the baseline (gunicorn sync workers).",
+        )
+
+    def handle(self, *args, **options):
+        count, latency = options["requests"], options["latency_ms"] / 1000
+
+        with FakeFlutterwave(latency) as base_url:
+            with override_settings(FLUTTERWAVE_BASE_URL=base_url, ALLOWED_HOSTS=["*"]):
+                async_elapsed, async_latencies, failures = asyncio.run(self.run_async(count))
+            sync_elapsed, sync_latencies = self.run_sync(base_url, count, options["sync_workers"])
+
+        self.stdout.write(f"provider latency: {options['latency_ms']}ms, requests: {count}")
+        self.report("async view (one worker)", count, async_elapsed, async_latencies)
+        self.report(f"sync baseline ({options['sync_workers']} workers)", count, sync_elapsed, sync_latencies)
+        if failures:
+            self.stderr.write(self.style.ERROR(f"{failures} async requests failed"))
+
+    async def run_async(self, count):
+        client = AsyncClient()
+
+        async def one():
+            started = time.monotonic()
+            response = await client.post(
+                "/api/flutterwave/create-payment/", PAYLOAD, content_type="application/json"
+            )
+            return time.monotonic() - started, response.status_code == 200
+
+        started = time.monotonic()
+        results = await asyncio.gather(*[one() for _ in range(count)])
+        elapsed = time.monotonic() - started
+        await close_async_sessions()
+        return elapsed, [duration for duration, _ in results], sum(1 for _, ok in results if not ok)
+
+    def run_sync(self, base_url, count, workers):
+        session = requests.Session()
+
+        def one(_):
+            started = time.monotonic()
+            session.post(f"{base_url}/v3/payments", json=PAYLOAD, timeout=30).raise_for_status()
+            return time.monotonic() - started
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(one, range(count)))
+        return time.monotonic() - started, latencies
+
+    def report(self, label, count, elapsed, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{label}: {count / elapsed:.1f} req/s over {elapsed:.2f}s, "
+            f"p50 {statistics.median(latencies) * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms"
+        )
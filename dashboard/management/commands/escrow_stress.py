@@ -0,0 +1,138 @@
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dashboard.escrow import EscrowError, hold, refund, release
+from dashboard.models import Escrow, EscrowOperation, Task, Transaction, Wallet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress the escrow engine: hold N escrows, then fire concurrent duplicate releases "
+        "(and with --race-refunds, refunds racing them) and check that every escrow moved "
+        "money exactly once. Needs PostgreSQL for real concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--escrows", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--repeat", type=int, default=3, help="Release attempts per escrow.")
+        parser.add_argument("--amount", type=Decimal, default=Decimal("100.00"))
+        parser.add_argument(
+            "--race-refunds", action="store_true",
+            help="Race refunds against the releases, sometimes under the same idempotency key.",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the generated users and tasks.")
+
+    def handle(self, *args, **options):
+        count, amount = options["escrows"], options["amount"]
+        run = uuid.uuid4().hex[:8]
+
+        poster = User.objects.create_user(email=f"escrow-poster-{run}@stress.local", first_name="Stress")
+        worker = User.objects.create_user(email=f"escrow-worker-{run}@stress.local", first_name="Stress")
+        Wallet.objects.create(user=worker)
+        Wallet.objects.create(user=poster).credit(amount * count, description="Stress test funding")
+
+        try:
+            tasks = Task.objects.bulk_create([
+                Task(
+                    poster=poster, worker=worker, title=f"Stress {i}", description="stress",
+                    category="local_micro", location="stress", price=amount, status=Task.Status.ASSIGNED,
+                )
+                for i in range(count)
+            ])
+            escrows = Escrow.objects.bulk_create([Escrow(task=task, amount=amount) for task in tasks])
+            escrow_ids = [escrow.pk for escrow in escrows]
+
+            held, _ = self.run_concurrently(
+                [(hold, escrow_id, None) for escrow_id in escrow_ids], options["threads"]
+            )
+
+            # Every escrow is moved `repeat` times: some retries reuse one
+            # idempotency key, the rest race with no key at all. Racing refunds
+            # share that key too, so the version check and the key's binding to
+            # one action both get exercised.
+            operations = [release, refund] if options["race_refunds"] else [release]
+            jobs = []
+            for escrow_id in escrow_ids:
+                key = f"stress-{run}-{escrow_id}"
+                jobs.extend(
+                    (random.choice(operations), escrow_id, random.choice([key, None]))
+                    for _ in range(options["repeat"])
+                )
+            random.shuffle(jobs)
+
+            started = time.monotonic()
+            succeeded, rejected = self.run_concurrently(jobs, options["threads"])
+            elapsed = time.monotonic() - started
+
+            self.report(poster, worker, escrow_ids, amount, held, succeeded, rejected, elapsed)
+        finally:
+            if not options["keep"]:
+                poster.delete()
+                worker.delete()
+
+    def run_concurrently(self, jobs, threads):
+        def attempt(job):
+            operation, escrow_id, key = job
+            try:
+                operation(escrow_id, idempotency_key=key)
+                return True
+            except EscrowError:
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(attempt, jobs))
+        return results.count(True), results.count(False)
+
+    def report(self, poster, worker, escrow_ids, amount, held, succeeded, rejected, elapsed):
+        count = len(escrow_ids)
+        worker_balance = Wallet.objects.get(user=worker).balance
+        poster_balance = Wallet.objects.get(user=poster).balance
+        payouts = Transaction.objects.filter(
+            wallet__user=worker, transaction_type=Transaction.TransactionType.CREDIT
+        ).count()
+        refunds = Transaction.objects.filter(
+            wallet__user=poster, transaction_type=Transaction.TransactionType.CREDIT,
+            description__startswith="Escrow refund",
+        ).count()
+        released = Escrow.objects.filter(pk__in=escrow_ids, status=Escrow.Status.RELEASED).count()
+        refunded = Escrow.objects.filter(pk__in=escrow_ids, status=Escrow.Status.REFUNDED).count()
+        completed = Task.objects.filter(escrow__pk__in=escrow_ids, status=Task.Status.COMPLETED).count()
+        settlements = EscrowOperation.objects.filter(
+            escrow_id__in=escrow_ids, action__in=[EscrowOperation.Action.RELEASE, EscrowOperation.Action.REFUND]
+        ).count()
+
+        self.stdout.write(f"held: {held}/{count}")
+        self.stdout.write(f"attempts: {succeeded + rejected} ({succeeded} ok, {rejected} rejected)")
+        self.stdout.write(f"throughput: {count / elapsed:.1f} escrows/s over {elapsed:.2f}s")
+        self.stdout.write(f"released: {released}, refunded: {refunded}, tasks completed: {completed}")
+        self.stdout.write(
+            f"worker balance: {worker_balance} (expected {amount * released}), payouts: {payouts}, "
+            f"poster balance: {poster_balance} (expected {amount * refunded}), refunds: {refunds}"
+        )
+
+        problems = []
+        if held != count:
+            problems.append("not every escrow was held")
+        if released + refunded != count or settlements != count:
+            problems.append("some escrows did not settle exactly once")
+        if worker_balance != amount * released or payouts != released:
+            problems.append("worker was not paid exactly once per released escrow")
+        if poster_balance != amount * refunded or refunds != refunded:
+            problems.append("poster was not refunded exactly once per refunded escrow")
+        if completed != released:
+            problems.append("completed tasks do not match released escrows")
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("No double payouts."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from dashboard import feed
+
+
+class Command(BaseCommand):
+    help = "Rebuild the errand feed read model from every errand source table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        counts = feed.rebuild(chunk_size=options["chunk_size"])
+        for errand_type, count in counts.items():
+            self.stdout.write(f"{errand_type}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Synced {sum(counts.values())} feed entries."))
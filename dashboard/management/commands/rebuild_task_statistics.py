@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.statistics import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every poster's TaskStatistic from feed entries, released escrows and completed tasks. "
+        "Stop the outbox relay first so live deltas are not overwritten."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Rebuilt statistics for {rebuild()} users.")
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.recommendations import refresh_active_runners
+
+
+class Command(BaseCommand):
+    help = "Precompute the recommended errand list of every recently active runner."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Only runners seen in the last N days.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        refreshed = refresh_active_runners(days=options["days"])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} runners in {elapsed:.2f}s."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import maintenance
+
+
+class Command(BaseCommand):
+    help = "Run the expiry and cleanup steps once (beat runs them every MAINTENANCE_INTERVAL_SECONDS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("steps", nargs="*", help="Only these steps (default: all).")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--list", action="store_true", help="List the registered steps and exit.")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for name in maintenance.steps():
+                self.stdout.write(name)
+            return
+        unknown = set(options["steps"]) - set(maintenance.steps())
+        if unknown:
+            raise CommandError(f"Unknown steps: {', '.join(sorted(unknown))}")
+        for name, rows in maintenance.run(options["steps"], options["batch_size"]).items():
+            self.stdout.write(f"{name}: {rows} rows")
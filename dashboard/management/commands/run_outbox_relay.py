@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox events to their handlers until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--interval", type=float, default=None, help="Seconds to sleep when idle.")
+        parser.add_argument("--once", action="store_true", help="Exit once the outbox is empty.")
+
+    def handle(self, *args, **options):
+        handled = outbox.relay(
+            interval=options["interval"], batch_size=options["batch_size"], once=options["once"]
+        )
+        self.stdout.write(f"Delivered {handled} outbox events; backlog: {outbox.stats()}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.settlement import settle_completed
+
+
+class Command(BaseCommand):
+    help = (
+        "Release held escrows of completed tasks and errands in chunked batch transactions. "
+        "Celery beat runs this as dashboard.tasks.settle_escrows; use the command for one-off runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many escrows.")
+
+    def handle(self, *args, **options):
+        report = settle_completed(chunk_size=options["chunk_size"], limit=options["limit"])
+        self.stdout.write(
+            f"Settled {report.settled} escrows ({report.amount}) into {report.wallets} wallet credits "
+            f"in {report.chunks} chunks, {report.elapsed:.2f}s ({report.throughput:.1f}/s)."
+        )
+        if report.failed:
+            self.stderr.write(self.style.ERROR(f"{report.failed} escrows failed: {report.errors}"))
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dashboard', '0009_errandapplication'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.IntegerField(default=5)),
+                ('comment', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('errand', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='review', to='dashboard.errandapplication')),
+                ('reviewer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ErrandFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('errand_type', models.CharField(choices=[('task', 'Task'), ('errand', 'Errand'), ('pickup_delivery', 'Pickup & Delivery'), ('care_task', 'Care Task'), ('verification_task', 'Verification Task'), ('supermarket_run', 'Supermarket Run')], max_length=30)),
+                ('source_id', models.CharField(max_length=64)),
+                ('title', models.CharField(max_length=255)),
+                ('category', models.CharField(blank=True, max_length=100)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('location_cell', models.CharField(blank=True, max_length=64)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('deadline', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('assigned', 'Assigned'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='open', max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', '-created_at', '-id'], name='feed_status_created_idx'), models.Index(fields=['owner', '-created_at', '-id'], name='feed_owner_created_idx'), models.Index(fields=['location_cell', 'status', '-created_at'], name='feed_cell_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='errandfeedentry',
+            constraint=models.UniqueConstraint(fields=('errand_type', 'source_id'), name='unique_feed_entry_source'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_review_errandfeedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='escrow',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='EscrowOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('hold', 'Hold'), ('release', 'Release'), ('refund', 'Refund')], max_length=10)),
+                ('idempotency_key', models.CharField(max_length=100, unique=True)),
+                ('version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('escrow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operations', to='dashboard.escrow')),
+            ],
+        ),
+    ]
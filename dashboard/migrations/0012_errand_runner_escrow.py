@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dashboard', '0011_escrow_version_escrowoperation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='errand',
+            name='runner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_errands', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='escrow',
+            name='errand',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='escrow', to='dashboard.errand'),
+        ),
+        migrations.AlterField(
+            model_name='escrow',
+            name='task',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='escrow', to='dashboard.task'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_applications(apps, schema_editor):
+    ErrandApplication = apps.get_model("dashboard", "ErrandApplication")
+    duplicates = (
+        ErrandApplication.objects
+        .values("errand_id", "runner_id")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for pair in duplicates.iterator():
+        # Keep an accepted application if there is one, otherwise the earliest.
+        rows = list(
+            ErrandApplication.objects
+            .filter(errand_id=pair["errand_id"], runner_id=pair["runner_id"])
+            .order_by("id")
+            .values_list("id", "status")
+        )
+        keep = next((pk for pk, status in rows if status == "accepted"), rows[0][0])
+        ErrandApplication.objects.filter(pk__in=[pk for pk, _ in rows if pk != keep]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_errand_runner_escrow'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_applications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='errandapplication',
+            constraint=models.UniqueConstraint(fields=('errand', 'runner'), name='unique_errand_application'),
+        ),
+    ]
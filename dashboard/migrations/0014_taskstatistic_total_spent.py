@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_unique_errand_application'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskstatistic',
+            name='total_spent',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=12),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    # The post_save receiver was bound to auth.User, so no custom user ever got a profile.
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserProfile = apps.get_model("dashboard", "UserProfile")
+    missing = User.objects.filter(profile__isnull=True).values_list("pk", flat=True)
+    UserProfile.objects.bulk_create(
+        (UserProfile(user_id=user_id) for user_id in missing.iterator()),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dashboard', '0014_taskstatistic_total_spent'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
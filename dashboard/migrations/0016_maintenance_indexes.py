@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0015_backfill_user_profiles'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='errandfeedentry',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['deadline'], name='feed_open_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickupdelivery',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['deadline'], name='pickup_pending_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:51
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_status(apps, schema_editor):
+    # Most specific first: an errand's escrow outcome beats its runner, which beats its deadline.
+    Errand = apps.get_model("dashboard", "Errand")
+    Errand.objects.filter(escrow__status="released").update(status="completed")
+    Errand.objects.filter(escrow__status="refunded").update(status="cancelled")
+    Errand.objects.filter(status="open", runner__isnull=False).update(status="assigned")
+    Errand.objects.filter(status="open", deadline__lt=timezone.now()).update(status="expired")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0016_maintenance_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='errand',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('assigned', 'Assigned'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='open', max_length=20),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='errand',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['-created_at'], name='errand_open_created_idx'),
+        ),
+    ]
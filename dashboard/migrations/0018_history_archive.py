@@ -0,0 +1,126 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+# Columns of each archive table, in the same types Django gives the source tables.
+ARCHIVE_TABLES = {
+    "dashboard_errandapplication_archive": [
+        ("id", models.BigIntegerField()),
+        ("errand_id", models.BigIntegerField()),
+        ("runner_id", models.UUIDField()),
+        ("offer_amount", models.DecimalField(max_digits=10, decimal_places=2)),
+        ("message", models.TextField()),
+        ("status", models.CharField(max_length=20)),
+        ("created_at", models.DateTimeField()),
+        ("archived_at", models.DateTimeField()),
+    ],
+    "dashboard_review_archive": [
+        ("id", models.BigIntegerField()),
+        ("errand_id", models.BigIntegerField()),
+        ("reviewer_id", models.UUIDField()),
+        ("rating", models.IntegerField()),
+        ("comment", models.TextField()),
+        ("created_at", models.DateTimeField()),
+        ("archived_at", models.DateTimeField()),
+    ],
+    "dashboard_transaction_archive": [
+        ("id", models.UUIDField()),
+        ("wallet_id", models.UUIDField()),
+        ("transaction_type", models.CharField(max_length=10)),
+        ("amount", models.DecimalField(max_digits=12, decimal_places=2)),
+        ("description", models.CharField(max_length=255)),
+        ("reference", models.CharField(max_length=100)),
+        ("created_at", models.DateTimeField()),
+        ("archived_at", models.DateTimeField()),
+    ],
+}
+
+ARCHIVE_INDEXES = {
+    "dashboard_errandapplication_archive": [("errand_id",), ("runner_id", "created_at")],
+    "dashboard_review_archive": [("errand_id",), ("reviewer_id", "created_at")],
+    "dashboard_transaction_archive": [("wallet_id", "created_at"), ("reference",)],
+}
+
+
+def create_archive_tables(apps, schema_editor):
+    # PostgreSQL requires a partitioned table's primary key to include the
+    # partition column; partitions themselves are made by core.partitions.
+    connection = schema_editor.connection
+    partitioned = connection.vendor == "postgresql"
+    quote = schema_editor.quote_name
+    for table, columns in ARCHIVE_TABLES.items():
+        definitions = [f"{quote(name)} {field.db_type(connection)} NOT NULL" for name, field in columns]
+        if partitioned:
+            definitions.append(f"PRIMARY KEY ({quote('id')}, {quote('created_at')})")
+        else:
+            definitions[0] += " PRIMARY KEY"
+        sql = f"CREATE TABLE {quote(table)} ({', '.join(definitions)})"
+        if partitioned:
+            sql += f" PARTITION BY RANGE ({quote('created_at')})"
+        schema_editor.execute(sql)
+        for fields in ARCHIVE_INDEXES[table]:
+            name = f"{table.replace('dashboard_', '')}_{'_'.join(fields)}_idx"
+            schema_editor.execute(
+                f"CREATE INDEX {quote(name)} ON {quote(table)} ({', '.join(quote(field) for field in fields)})"
+            )
+
+
+def drop_archive_tables(apps, schema_editor):
+    for table in ARCHIVE_TABLES:
+        schema_editor.execute(f"DROP TABLE {schema_editor.quote_name(table)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0017_errand_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_archive_tables, drop_archive_tables),
+        migrations.CreateModel(
+            name='ErrandApplicationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('offer_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('message', models.TextField(blank=True)),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'dashboard_errandapplication_archive',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('rating', models.IntegerField()),
+                ('comment', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'dashboard_review_archive',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TransactionArchive',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('transaction_type', models.CharField(choices=[('CREDIT', 'Credit'), ('DEBIT', 'Debit')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('reference', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'dashboard_transaction_archive',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:20
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_runner(apps, schema_editor):
+    # Errands accepted through the old application PATCH never got a runner, so
+    # 0017 left them open (or expired) and they could be accepted again.
+    Errand = apps.get_model("dashboard", "Errand")
+    ErrandApplication = apps.get_model("dashboard", "ErrandApplication")
+    ErrandFeedEntry = apps.get_model("dashboard", "ErrandFeedEntry")
+    accepted = ErrandApplication.objects.filter(errand=OuterRef("pk"), status="accepted")
+    unassigned = Errand.objects.filter(runner__isnull=True, applications__status="accepted")
+    ids = list(unassigned.values_list("pk", flat=True).distinct())
+    if not ids:
+        return
+    Errand.objects.filter(pk__in=ids).update(runner=Subquery(accepted.values("runner")[:1]))
+    Errand.objects.filter(pk__in=ids, status__in=["open", "expired"]).update(status="assigned")
+    ErrandFeedEntry.objects.filter(
+        errand_type="errand", source_id__in=[str(pk) for pk in ids], status__in=["open", "expired"]
+    ).update(status="assigned")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0018_history_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_runner, migrations.RunPython.noop),
+    ]
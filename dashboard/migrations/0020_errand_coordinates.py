@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0019_backfill_errand_runner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='errand',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='errand',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from datetime import timedelta
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 from django.conf import settings
 import uuid
@@ -20,29 +21,41 @@ class Wallet(models.Model):
     def __str__(self):
         return f"{self.user} - {self.balance} {self.currency}"
 
-    def credit(self, amount, description="Wallet funded"):
-
-        self.balance += amount
-        self.save()
-        Transaction.objects.create(
-            wallet=self,
-            amount=amount,
-            transaction_type=Transaction.TransactionType.CREDIT,
-            description=description,
-        )
-
-    def debit(self, amount, description="Wallet debited"):
-
-        if self.balance < amount:
-            raise ValueError("Insufficient balance")
-        self.balance -= amount
-        self.save()
-        Transaction.objects.create(
-            wallet=self,
-            amount=amount,
-            transaction_type=Transaction.TransactionType.DEBIT,
-            description=description,
-        )
+    def credit(self, amount, description="Wallet funded", reference=None):
+        from .session import invalidate_session
+
+        with transaction.atomic():
+            Wallet.objects.filter(pk=self.pk).update(balance=F("balance") + amount)
+            Transaction.objects.create(
+                wallet=self,
+                amount=amount,
+                transaction_type=Transaction.TransactionType.CREDIT,
+                description=description,
+                reference=reference or uuid.uuid4(),
+            )
+            invalidate_session([self.user_id])
+        self.refresh_from_db(fields=["balance"])
+
+    def debit(self, amount, description="Wallet debited", reference=None):
+        from .session import invalidate_session
+
+        with transaction.atomic():
+            # The balance check and the decrement are one conditional UPDATE, so
+            # two concurrent debits can never take the wallet below zero.
+            updated = Wallet.objects.filter(pk=self.pk, balance__gte=amount).update(
+                balance=F("balance") - amount
+            )
+            if not updated:
+                raise ValueError("Insufficient balance")
+            Transaction.objects.create(
+                wallet=self,
+                amount=amount,
+                transaction_type=Transaction.TransactionType.DEBIT,
+                description=description,
+                reference=reference or uuid.uuid4(),
+            )
+            invalidate_session([self.user_id])
+        self.refresh_from_db(fields=["balance"])
 
 
 class Transaction(models.Model):
@@ -98,13 +111,40 @@ class Task(models.Model):
 
         self.worker = worker
         self.status = self.Status.ASSIGNED
-        self.save()
-
-    def mark_completed(self):
+        self.save(update_fields=["worker", "status", "updated_at"])
+
+    def mark_completed(self, settle=None, idempotency_key=None):
+        # Completing a task with escrow goes through the escrow release, which
+        # pays the worker and completes the task in the same transaction. With
+        # ESCROW_BATCH_SETTLEMENT (or settle=False) the escrow stays held and
+        # dashboard.settlement releases it, together with others, later.
+        if hasattr(self, "escrow") and self.escrow.status == Escrow.Status.HELD:
+            if settle is None:
+                settle = not settings.ESCROW_BATCH_SETTLEMENT
+            if settle:
+                self.escrow.release_funds(idempotency_key=idempotency_key)
+                self.refresh_from_db()
+                return
+            from .escrow import InvalidTransition
+
+            now = timezone.now()
+            if not Task.objects.filter(pk=self.pk, worker__isnull=False).exclude(
+                status__in=[self.Status.COMPLETED, self.Status.CANCELLED]
+            ).update(status=self.Status.COMPLETED, completed_at=now, updated_at=now):
+                raise InvalidTransition("Only an assigned task can be completed.")
+            self.refresh_from_db()
+            return
+
+        from core import outbox
+        from . import events, statistics
 
         self.status = self.Status.COMPLETED
         self.completed_at = timezone.now()
-        self.save()
+        with transaction.atomic():
+            self.save(update_fields=["status", "completed_at", "updated_at"])
+            outbox.emit(events.ERRAND_COMPLETED, {"completions": [
+                statistics.completion("task", self.pk, self.poster_id, self.price),
+            ]}, aggregate=self)
 
     def __str__(self):
         return f"{self.title} - {self.get_category_display()}"
@@ -134,27 +174,61 @@ class Escrow(models.Model):
         REFUNDED = "refunded", "Refunded to Poster"
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    task = models.OneToOneField(Task, on_delete=models.CASCADE, related_name="escrow")
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, null=True, blank=True, related_name="escrow")
+    errand = models.OneToOneField(
+        "Errand", on_delete=models.CASCADE, null=True, blank=True, related_name="escrow"
+    )
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     released_at = models.DateTimeField(null=True, blank=True)
 
-    def hold_funds(self):
-        self.status = self.Status.HELD
-        self.save()
+    @property
+    def payer_id(self):
+        if self.task_id:
+            return self.task.poster_id
+        return self.errand.user_id
+
+    @property
+    def payee_id(self):
+        if self.task_id:
+            return self.task.worker_id
+        return self.errand.runner_id
+
+    def hold_funds(self, idempotency_key=None):
+        from .escrow import hold
+        hold(self, idempotency_key=idempotency_key)
+        self.refresh_from_db()
+
+    def release_funds(self, idempotency_key=None):
+        from .escrow import release
+        release(self, idempotency_key=idempotency_key)
+        self.refresh_from_db()
+
+    def refund(self, idempotency_key=None):
+        from .escrow import refund
+        refund(self, idempotency_key=idempotency_key)
+        self.refresh_from_db()
+
+    def __str__(self):
+        return f"Escrow for {(self.task or self.errand).title} - {self.status}"
 
-    def release_funds(self):
-        self.status = self.Status.RELEASED
-        self.released_at = timezone.now()
-        self.save()
 
-    def refund(self):
-        self.status = self.Status.REFUNDED
-        self.save()
+class EscrowOperation(models.Model):
+    class Action(models.TextChoices):
+        HOLD = "hold", "Hold"
+        RELEASE = "release", "Release"
+        REFUND = "refund", "Refund"
+
+    escrow = models.ForeignKey(Escrow, on_delete=models.CASCADE, related_name="operations")
+    action = models.CharField(max_length=10, choices=Action.choices)
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Escrow for {self.task.title} - {self.status}"
+        return f"{self.action} {self.escrow_id} ({self.idempotency_key})"
 
 
 
@@ -166,13 +240,14 @@ class TaskStatistic(models.Model):
     success_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
     total_time_saved = models.DurationField(default=timedelta())
     average_cost_per_errand = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
 
     def update_success_rate(self):
         if self.total_tasks_posted > 0:
             self.success_rate = (self.total_tasks_completed / self.total_tasks_posted) * 100
         else:
             self.success_rate = 0
-        self.save()
+        TaskStatistic.objects.filter(pk=self.pk).update(success_rate=self.success_rate)
 
     def __str__(self):
         return f"Stats for {self.user}"
@@ -224,6 +299,11 @@ class PickupDelivery(models.Model):
     status = models.CharField(max_length=20, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["deadline"], name="pickup_pending_deadline_idx", condition=Q(status="pending")),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -340,11 +420,6 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username} ({self.tier})"
 
-    def update_tier(self):
-        if self.errands_completed >= 3 and self.tier == 'tier_1':
-            self.tier = 'tier_2'
-            self.save()
-
 class Category(models.Model):
     name = models.CharField(max_length=100)
 
@@ -353,20 +428,62 @@ class Category(models.Model):
 
 
 class Errand(models.Model):
+    class Status(models.TextChoices):
+        OPEN = "open", "Open"
+        ASSIGNED = "assigned", "Assigned"
+        COMPLETED = "completed", "Completed"
+        CANCELLED = "cancelled", "Cancelled"
+        EXPIRED = "expired", "Expired"
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='errands')
     title = models.CharField(max_length=200)
     description = models.TextField()
     location = models.CharField(max_length=255)
+    # Where the errand happens, when the poster's device shares it; recommendations
+    # and area feeds place errands by these rather than the free-text location.
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
     price_min = models.DecimalField(max_digits=10, decimal_places=2)
     price_max = models.DecimalField(max_digits=10, decimal_places=2)
     estimated_duration = models.CharField(max_length=100)
     deadline = models.DateTimeField()
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='errands')
+    runner = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_errands'
+    )
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Open errands are the live working set; closed history stays out of the index.
+            models.Index(fields=["-created_at"], name="errand_open_created_idx", condition=Q(status="open")),
+        ]
+
     def __str__(self):
         return self.title
 
+    def mark_completed(self, settle=None, idempotency_key=None):
+        # An assigned errand always has a held escrow (accept_application); as
+        # with Task.mark_completed, it is released now or by batch settlement.
+        from .escrow import InvalidTransition
+
+        if settle is None:
+            settle = not settings.ESCROW_BATCH_SETTLEMENT
+        if settle:
+            self.escrow.release_funds(idempotency_key=idempotency_key)
+            self.refresh_from_db()
+            return
+        with transaction.atomic():
+            if not Errand.objects.filter(
+                pk=self.pk, status=self.Status.ASSIGNED, runner__isnull=False, escrow__status=Escrow.Status.HELD
+            ).update(status=self.Status.COMPLETED):
+                raise InvalidTransition("Only an assigned errand can be completed.")
+            ErrandFeedEntry.objects.filter(
+                errand_type=ErrandFeedEntry.ErrandType.ERRAND, source_id=str(self.pk)
+            ).update(status=ErrandFeedEntry.Status.COMPLETED, updated_at=timezone.now())
+        self.refresh_from_db()
+
 class ErrandApplication(models.Model):
     errand = models.ForeignKey(Errand, on_delete=models.CASCADE, related_name="applications")
     runner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="runner_applications")
@@ -379,6 +496,11 @@ class ErrandApplication(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["errand", "runner"], name="unique_errand_application"),
+        ]
+
 
 class RunnerProfile(models.Model):
 
@@ -406,3 +528,102 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
 
+# Settled history is moved out of the tables above into these (dashboard.archive).
+# On PostgreSQL they are partitioned by month of created_at, with (id, created_at)
+# as primary key, so they are created by migration rather than by Django; the
+# foreign keys are there for joins only and aren't enforced.
+
+class ErrandApplicationArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    errand = models.ForeignKey(Errand, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    runner = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    offer_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    message = models.TextField(blank=True)
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "dashboard_errandapplication_archive"
+
+
+class ReviewArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    errand = models.ForeignKey(
+        ErrandApplication, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    reviewer = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    rating = models.IntegerField()
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "dashboard_review_archive"
+
+
+class TransactionArchive(models.Model):
+    id = models.UUIDField(primary_key=True)
+    wallet = models.ForeignKey(Wallet, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TransactionType.choices)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    description = models.CharField(max_length=255, blank=True)
+    reference = models.CharField(max_length=100)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "dashboard_transaction_archive"
+
+
+class ErrandFeedEntry(models.Model):
+    class ErrandType(models.TextChoices):
+        TASK = "task", "Task"
+        ERRAND = "errand", "Errand"
+        PICKUP_DELIVERY = "pickup_delivery", "Pickup & Delivery"
+        CARE_TASK = "care_task", "Care Task"
+        VERIFICATION_TASK = "verification_task", "Verification Task"
+        SUPERMARKET_RUN = "supermarket_run", "Supermarket Run"
+
+    class Status(models.TextChoices):
+        OPEN = "open", "Open"
+        ASSIGNED = "assigned", "Assigned"
+        IN_PROGRESS = "in_progress", "In Progress"
+        COMPLETED = "completed", "Completed"
+        CANCELLED = "cancelled", "Cancelled"
+        EXPIRED = "expired", "Expired"
+
+    errand_type = models.CharField(max_length=30, choices=ErrandType.choices)
+    source_id = models.CharField(max_length=64)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="feed_entries")
+
+    title = models.CharField(max_length=255)
+    category = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    location_cell = models.CharField(max_length=64, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    deadline = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["errand_type", "source_id"], name="unique_feed_entry_source"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "-created_at", "-id"], name="feed_status_created_idx"),
+            models.Index(fields=["owner", "-created_at", "-id"], name="feed_owner_created_idx"),
+            models.Index(fields=["location_cell", "status", "-created_at"], name="feed_cell_status_idx"),
+            models.Index(fields=["deadline"], name="feed_open_deadline_idx", condition=Q(status="open")),
+        ]
+
+    def __str__(self):
+        return f"{self.get_errand_type_display()}: {self.title}"
@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FeedCursorPagination(CursorPagination):
+    # Keyset pagination over (created_at, id): every page is an index range scan,
+    # however deep the client scrolls.
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    ordering = ("-created_at", "-id")
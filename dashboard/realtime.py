@@ -0,0 +1,58 @@
+import json
+import logging
+import re
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+APPLICATION_CREATED = "application.created"
+APPLICATION_ACCEPTED = "application.accepted"
+APPLICATION_REJECTED = "application.rejected"
+ERRAND_ASSIGNED = "errand.assigned"
+ERRAND_POSTED = "errand.posted"
+ESCROW_RELEASED = "escrow.released"
+WALLET_FUNDED = "wallet.funded"
+
+# Every process serving the SSE feed listens here for a wake-up after new posts.
+FEED_GROUP = "feed.posted"
+
+
+def user_group(user_id):
+    return f"user.{user_id}"
+
+
+def errand_group(errand_id):
+    return f"errand.{errand_id}"
+
+
+def cell_group(cell):
+    # Group names may only hold ASCII letters, digits, hyphens, underscores and periods.
+    return "cell." + re.sub(r"[^A-Za-z0-9_.-]", "_", cell.replace(":", "."))[:90]
+
+
+def _send(groups, message):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    for group in groups:
+        try:
+            async_to_sync(layer.group_send)(group, message)
+        except Exception:
+            # Push is best effort; clients still reconcile through the REST endpoints.
+            logger.exception("Failed to publish %s to %s", message["event"], group)
+
+
+def publish(groups, event, data):
+    groups = [group for group in dict.fromkeys(groups) if group]
+    if not groups:
+        return
+    message = {
+        "type": "realtime.event",
+        "event": event,
+        "data": json.loads(json.dumps(data, cls=DjangoJSONEncoder)),
+    }
+    transaction.on_commit(lambda: _send(groups, message))
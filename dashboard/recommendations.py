@@ -0,0 +1,374 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .feed import location_cell
+from .models import ErrandFeedEntry, ErrandApplication, RunnerProfile
+
+EARTH_RADIUS_KM = 6371.0
+NEUTRAL_SCORE = 0.5
+
+WEIGHTS = {
+    "distance": 0.35,
+    "price": 0.2,
+    "category": 0.25,
+    "urgency": 0.2,
+}
+
+RUNNER_FEATURES_KEY = "recommendations:runner-features:{user_id}"
+RUNNER_FEATURES_TTL = 60 * 60
+
+TOP_LIST_KEY = "recommendations:top:{user_id}"
+TOP_LIST_TTL = 6 * 60 * 60
+CELL_INDEX_KEY = "recommendations:runners-by-cell:{cell}"
+CATEGORY_INDEX_KEY = "recommendations:runners-by-category:{category}"
+
+CANDIDATES_TTL = 30
+
+FEED_ROW_FIELDS = (
+    "source_id", "owner_id", "category", "latitude", "longitude",
+    "price_min", "price_max", "deadline",
+)
+
+_candidates_lock = threading.Lock()
+_candidates = {}
+
+
+class CandidateSet:
+    # Column-oriented snapshot of open feed entries so that scoring is a
+    # handful of array operations instead of a Python loop over rows.
+
+    def __init__(self, rows):
+        count = len(rows)
+        self.loaded_at = time.monotonic()
+        self.source_ids = []
+        self.owner_codes = np.empty(count, dtype=np.int64)
+        self.latitudes = np.full(count, np.nan)
+        self.longitudes = np.full(count, np.nan)
+        self.prices = np.full(count, np.nan)
+        self.price_floors = np.zeros(count)
+        self.category_codes = np.empty(count, dtype=np.int64)
+        self.deadlines = np.full(count, np.nan)
+
+        self.owners = {}
+        self.categories = {}
+        for index, (source_id, owner_id, category, latitude, longitude,
+                    price_min, price_max, deadline) in enumerate(rows):
+            self.source_ids.append(source_id)
+            self.owner_codes[index] = self.owners.setdefault(owner_id, len(self.owners))
+            self.category_codes[index] = self.categories.setdefault(category, len(self.categories))
+            if latitude is not None and longitude is not None:
+                self.latitudes[index] = latitude
+                self.longitudes[index] = longitude
+            low = price_min if price_min is not None else price_max
+            high = price_max if price_max is not None else price_min
+            if low is not None:
+                self.prices[index] = (float(low) + float(high)) / 2
+                self.price_floors[index] = float(low)
+            if deadline is not None:
+                self.deadlines[index] = deadline.timestamp()
+
+    def __len__(self):
+        return len(self.source_ids)
+
+    @property
+    def is_stale(self):
+        return time.monotonic() - self.loaded_at > CANDIDATES_TTL
+
+
+def load_candidates(errand_types):
+    rows = (
+        ErrandFeedEntry.objects
+        .filter(status=ErrandFeedEntry.Status.OPEN, errand_type__in=errand_types)
+        .filter(Q(deadline__isnull=True) | Q(deadline__gt=timezone.now()))
+        .values_list(*FEED_ROW_FIELDS)
+    )
+    return CandidateSet(list(rows))
+
+
+def get_candidates(errand_types):
+    key = tuple(sorted(errand_types))
+    candidates = _candidates.get(key)
+    if candidates is None or candidates.is_stale:
+        with _candidates_lock:
+            candidates = _candidates.get(key)
+            if candidates is None or candidates.is_stale:
+                candidates = load_candidates(key)
+                _candidates[key] = candidates
+    return candidates
+
+
+def build_runner_features(user):
+    profile = RunnerProfile.objects.filter(user=user).only("tier", "latitude", "longitude").first()
+
+    history = list(
+        ErrandApplication.objects
+        .filter(runner=user)
+        .order_by("-created_at")
+        .values_list("offer_amount", "errand__category__name")[:200]
+    )
+    offers = [float(amount) for amount, _ in history if amount is not None]
+
+    affinity = {}
+    for _, category in history:
+        affinity[category or ""] = affinity.get(category or "", 0) + 1
+    total = sum(affinity.values())
+    affinity = {category: count / total for category, count in affinity.items()} if total else {}
+
+    return {
+        "latitude": profile.latitude if profile else None,
+        "longitude": profile.longitude if profile else None,
+        "tier": profile.tier if profile else "Tier 1",
+        "typical_price": float(np.median(offers)) if offers else None,
+        "affinity": affinity,
+    }
+
+
+def get_runner_features(user):
+    key = RUNNER_FEATURES_KEY.format(user_id=user.pk)
+    features = cache.get(key)
+    if features is None:
+        features = build_runner_features(user)
+        cache.set(key, features, RUNNER_FEATURES_TTL)
+    return features
+
+
+def invalidate_runner_features(user_id):
+    cache.delete(RUNNER_FEATURES_KEY.format(user_id=user_id))
+
+
+def score_candidates(features, candidates, exclude_owner=None, now=None):
+    now = now or time.time()
+    scores = np.zeros(len(candidates))
+
+    # Distance: exponential decay from the runner's last known position. Where
+    # either side has no coordinates the term is left out, and the other terms
+    # are scaled up below to fill its weight.
+    located = np.zeros(len(candidates), dtype=bool)
+    if features["latitude"] is not None and features["longitude"] is not None:
+        lat1 = np.radians(features["latitude"])
+        lat2 = np.radians(candidates.latitudes)
+        d_lat = lat2 - lat1
+        d_lng = np.radians(candidates.longitudes - features["longitude"])
+        a = np.sin(d_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(d_lng / 2) ** 2
+        distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        distance = np.exp(-distance_km / settings.RECOMMENDATION_DISTANCE_SCALE_KM)
+        located = ~np.isnan(distance)
+        scores += WEIGHTS["distance"] * np.where(located, distance, 0.0)
+
+    # Price: closeness (in log space) to what the runner usually offers.
+    if features["typical_price"]:
+        ratio = np.log(candidates.prices / features["typical_price"])
+        price = np.exp(-np.abs(ratio))
+        price = np.where(np.isnan(price), NEUTRAL_SCORE, price)
+    else:
+        price = NEUTRAL_SCORE
+    scores += WEIGHTS["price"] * price
+
+    # Category: share of the runner's past applications in the same category.
+    affinity = np.zeros(len(candidates.categories))
+    for category, code in candidates.categories.items():
+        affinity[code] = features["affinity"].get(category, 0.0)
+    scores += WEIGHTS["category"] * affinity[candidates.category_codes]
+
+    # Urgency: errands due soon float up; no deadline counts as not urgent.
+    hours_left = (candidates.deadlines - now) / 3600
+    urgency = 1 / (1 + np.maximum(hours_left, 0) / 48)
+    scores += WEIGHTS["urgency"] * np.where(np.isnan(urgency), 0.0, urgency)
+    scores = np.where(located, scores, scores / (1 - WEIGHTS["distance"]))
+
+    eligible = ~(candidates.deadlines <= now)
+    price_cap = settings.RECOMMENDATION_TIER_PRICE_CAPS.get(features["tier"])
+    if price_cap is not None:
+        eligible &= candidates.price_floors <= price_cap
+    if exclude_owner is not None and exclude_owner in candidates.owners:
+        eligible &= candidates.owner_codes != candidates.owners[exclude_owner]
+
+    return np.where(eligible, scores, -np.inf)
+
+
+def top_k(scores, k):
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def recommend(user, errand_types=(ErrandFeedEntry.ErrandType.ERRAND,), limit=None):
+    limit = limit or settings.RECOMMENDATION_TOP_K
+    candidates = get_candidates(errand_types)
+    if not len(candidates):
+        return []
+
+    scores = score_candidates(get_runner_features(user), candidates, exclude_owner=user.pk)
+    return [
+        (candidates.source_ids[index], float(scores[index]))
+        for index in top_k(scores, limit)
+    ]
+
+
+# Precomputed per-runner lists. Each runner's top N errand ids and scores are
+# packed into two flat arrays so a cache entry for 200 errands is ~2.4KB and a
+# page is served by slicing it.
+
+def pack_top_list(ids, scores):
+    return {
+        "ids": np.asarray(ids, dtype=np.int64).tobytes(),
+        "scores": np.asarray(scores, dtype=np.float32).tobytes(),
+        "computed_at": time.time(),
+    }
+
+
+def unpack_top_list(packed):
+    return (
+        np.frombuffer(packed["ids"], dtype=np.int64),
+        np.frombuffer(packed["scores"], dtype=np.float32),
+    )
+
+
+def store_top_list(user_id, ids, scores):
+    cache.set(TOP_LIST_KEY.format(user_id=user_id), pack_top_list(ids, scores), TOP_LIST_TTL)
+
+
+def get_top_list(user):
+    packed = cache.get(TOP_LIST_KEY.format(user_id=user.pk))
+    if packed is None:
+        ranked = recommend(user)
+        ids = [int(source_id) for source_id, _ in ranked]
+        scores = [score for _, score in ranked]
+        store_top_list(user.pk, ids, scores)
+        return ids
+    ids, _ = unpack_top_list(packed)
+    return ids.tolist()
+
+
+def discard_from_top_list(user_id, errand_ids):
+    key = TOP_LIST_KEY.format(user_id=user_id)
+    packed = cache.get(key)
+    if packed is None:
+        return
+    ids, scores = unpack_top_list(packed)
+    keep = ~np.isin(ids, list(errand_ids))
+    store_top_list(user_id, ids[keep], scores[keep])
+
+
+def neighbouring_cells(latitude, longitude):
+    if latitude is None or longitude is None:
+        return []
+    size = settings.FEED_CELL_SIZE_DEGREES
+    return [
+        location_cell(latitude + d_lat * size, longitude + d_lng * size)
+        for d_lat in (-1, 0, 1)
+        for d_lng in (-1, 0, 1)
+    ]
+
+
+def active_runners(days=None):
+    days = days or settings.RECOMMENDATION_ACTIVE_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    return (
+        RunnerProfile.objects
+        .filter(user__is_active=True, user__last_login__gte=cutoff)
+        .select_related("user")
+    )
+
+
+def refresh_active_runners(days=None, limit=None):
+    limit = limit or settings.RECOMMENDATION_TOP_K
+    candidates = load_candidates((ErrandFeedEntry.ErrandType.ERRAND,))
+    runners_by_cell, runners_by_category = {}, {}
+    refreshed = 0
+
+    for profile in active_runners(days).iterator(chunk_size=500):
+        user = profile.user
+        features = build_runner_features(user)
+        cache.set(RUNNER_FEATURES_KEY.format(user_id=user.pk), features, RUNNER_FEATURES_TTL)
+
+        if len(candidates):
+            scores = score_candidates(features, candidates, exclude_owner=user.pk)
+            best = top_k(scores, limit)
+            ids = [int(candidates.source_ids[index]) for index in best]
+            store_top_list(user.pk, ids, scores[best])
+        else:
+            store_top_list(user.pk, [], [])
+
+        for cell in neighbouring_cells(features["latitude"], features["longitude"]):
+            runners_by_cell.setdefault(cell, []).append(str(user.pk))
+        for category in features["affinity"]:
+            runners_by_category.setdefault(category, []).append(str(user.pk))
+        refreshed += 1
+
+    index = {CELL_INDEX_KEY.format(cell=cell): ids for cell, ids in runners_by_cell.items()}
+    index.update({
+        CATEGORY_INDEX_KEY.format(category=category): ids
+        for category, ids in runners_by_category.items()
+    })
+    cache.set_many(index, TOP_LIST_TTL)
+    return refreshed
+
+
+def on_errands_posted(entries, limit=None):
+    # Merge freshly posted errands into the cached lists of runners who work in
+    # that area or category, instead of waiting for the next full refresh.
+    limit = limit or settings.RECOMMENDATION_TOP_K
+    entries = [
+        entry for entry in entries
+        if entry.errand_type == ErrandFeedEntry.ErrandType.ERRAND
+        and entry.status == ErrandFeedEntry.Status.OPEN
+    ]
+    if not entries:
+        return 0
+
+    index_keys = set()
+    for entry in entries:
+        if entry.location_cell:
+            index_keys.add(CELL_INDEX_KEY.format(cell=entry.location_cell))
+        index_keys.add(CATEGORY_INDEX_KEY.format(category=entry.category))
+    runner_ids = set()
+    for ids in cache.get_many(list(index_keys)).values():
+        runner_ids.update(ids)
+    if not runner_ids:
+        return 0
+
+    candidates = CandidateSet([
+        tuple(getattr(entry, field) for field in FEED_ROW_FIELDS) for entry in entries
+    ])
+    feature_keys = {RUNNER_FEATURES_KEY.format(user_id=runner_id): runner_id for runner_id in runner_ids}
+    list_keys = {TOP_LIST_KEY.format(user_id=runner_id): runner_id for runner_id in runner_ids}
+    features_by_runner = {
+        feature_keys[key]: features for key, features in cache.get_many(list(feature_keys)).items()
+    }
+    lists_by_runner = {
+        list_keys[key]: packed for key, packed in cache.get_many(list(list_keys)).items()
+    }
+
+    updated = {}
+    for runner_id, packed in lists_by_runner.items():
+        features = features_by_runner.get(runner_id)
+        if features is None:
+            continue
+        new_scores = score_candidates(features, candidates, exclude_owner=uuid.UUID(runner_id))
+        fresh = np.isfinite(new_scores)
+        if not fresh.any():
+            continue
+
+        ids, scores = unpack_top_list(packed)
+        new_ids = np.array([int(candidates.source_ids[i]) for i in np.flatnonzero(fresh)], dtype=np.int64)
+        keep = ~np.isin(ids, new_ids)
+        merged_ids = np.concatenate([ids[keep], new_ids])
+        merged_scores = np.concatenate([scores[keep], new_scores[fresh].astype(np.float32)])
+        order = np.argsort(-merged_scores, kind="stable")[:limit]
+        updated[TOP_LIST_KEY.format(user_id=runner_id)] = pack_top_list(merged_ids[order], merged_scores[order])
+
+    if updated:
+        cache.set_many(updated, TOP_LIST_TTL)
+    return len(updated)
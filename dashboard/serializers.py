@@ -3,9 +3,18 @@ from django.utils import timezone
 
 from rest_framework import serializers
 from .models import Task, SupermarketRun, PickupDelivery, ErrandImage, CareTask, VerificationTask, UserProfile, \
-    Category, Errand, ErrandApplication, Review
+    Category, Errand, ErrandApplication, Review, ErrandFeedEntry, TaskStatistic
 
 
+class BulkCreateListSerializer(serializers.ListSerializer):
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create(
+            [model(**attrs) for attrs in validated_data],
+            batch_size=500,
+        )
+
 class TaskSerializer(serializers.ModelSerializer):
     category_display = serializers.CharField(source='get_category_display', read_only=True)
 
@@ -27,6 +36,7 @@ class PickupDeliverySerializer(serializers.ModelSerializer):
         model = PickupDelivery
         fields = "__all__"
         read_only_fields = ["user", "status", "created_at"]
+        list_serializer_class = BulkCreateListSerializer
 
 class ErrandImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
@@ -52,6 +62,7 @@ class CareTaskSerializer(serializers.ModelSerializer):
         model = CareTask
         fields = '__all__'
         read_only_fields = ['user', 'created_at']
+        list_serializer_class = BulkCreateListSerializer
 
 
 class VerificationTaskSerializer(serializers.ModelSerializer):
@@ -59,6 +70,7 @@ class VerificationTaskSerializer(serializers.ModelSerializer):
         model = VerificationTask
         fields = '__all__'
         read_only_fields = ['user', 'created_at']
+        list_serializer_class = BulkCreateListSerializer
 
 class UserTierSerializer(serializers.ModelSerializer):
     errands_left_for_next_tier = serializers.SerializerMethodField()
@@ -70,6 +82,20 @@ class UserTierSerializer(serializers.ModelSerializer):
     def get_errands_left_for_next_tier(self, obj):
         return max(0, 3 - obj.errands_completed)
 
+class TaskStatisticSerializer(serializers.ModelSerializer):
+    total_time_saved_hours = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TaskStatistic
+        fields = [
+            'total_tasks_posted', 'total_tasks_completed', 'success_rate', 'total_spent',
+            'average_cost_per_errand', 'total_time_saved_hours',
+        ]
+
+    def get_total_time_saved_hours(self, obj):
+        return round(obj.total_time_saved.total_seconds() / 3600, 1)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -101,6 +127,8 @@ class ErrandSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "location",
+            "latitude",
+            "longitude",
             "estimated_duration",
             "price_min",
             "price_max",
@@ -108,6 +136,7 @@ class ErrandSerializer(serializers.ModelSerializer):
             "deadline",
             "client",
             "category_name",
+            "status",
             "is_overdue",
             "created_at",
 
@@ -115,6 +144,12 @@ class ErrandSerializer(serializers.ModelSerializer):
             "applications",
             "has_applied",
         ]
+        read_only_fields = ["status"]
+        list_serializer_class = BulkCreateListSerializer
+        extra_kwargs = {
+            "latitude": {"min_value": -90, "max_value": 90},
+            "longitude": {"min_value": -180, "max_value": 180},
+        }
 
     def get_client(self, obj):
         user = obj.user
@@ -190,7 +225,7 @@ class ErrandApplicationSerializer(serializers.ModelSerializer):
             "status",
             "created_at",
         ]
-        read_only_fields = ["status", "created_at", "runner_name", "errand_title"]
+        read_only_fields = ["errand", "runner", "status", "created_at", "runner_name", "errand_title"]
 
 class ReviewSerializer(serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)
@@ -241,3 +276,29 @@ class RunnerDetailsSerializer(serializers.ModelSerializer):
     def get_runner_profile(self, obj):
         profile = obj.runner.profile
         return RunnerProfileMiniSerializer(profile).data
+
+
+class ErrandFeedEntrySerializer(serializers.ModelSerializer):
+    errand_type_display = serializers.CharField(source="get_errand_type_display", read_only=True)
+
+    class Meta:
+        model = ErrandFeedEntry
+        fields = [
+            "id",
+            "errand_type",
+            "errand_type_display",
+            "source_id",
+            "owner",
+            "title",
+            "category",
+            "location",
+            "location_cell",
+            "latitude",
+            "longitude",
+            "price_min",
+            "price_max",
+            "deadline",
+            "status",
+            "created_at",
+        ]
+        read_only_fields = fields
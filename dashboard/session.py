@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from authentication.models import Onboarding
+from core.cache import is_shared
+from .models import Task
+from .tiers import tier_state
+
+SESSION_KEY = "session:bootstrap:{user_id}"
+
+
+def invalidate_session(user_ids):
+    keys = [SESSION_KEY.format(user_id=user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _related(user, name):
+    try:
+        return getattr(user, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def build_session(user_id):
+    """Everything the app needs at launch, read with a single query."""
+    latest_task = Task.objects.filter(poster=OuterRef("pk")).order_by("-created_at")
+    user = (
+        get_user_model().objects
+        .select_related("profile", "terms", "wallet", "runner_profile")
+        .annotate(
+            latest_task_id=Subquery(latest_task.values("id")[:1]),
+            latest_task_title=Subquery(latest_task.values("title")[:1]),
+            latest_task_status=Subquery(latest_task.values("status")[:1]),
+            latest_task_created_at=Subquery(latest_task.values("created_at")[:1]),
+        )
+        .get(pk=user_id)
+    )
+    profile = _related(user, "profile")
+    terms = _related(user, "terms")
+    wallet = _related(user, "wallet")
+    runner = _related(user, "runner_profile")
+
+    return {
+        "user": {
+            "id": str(user.id),
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "phone": user.phone_number,
+            "role": user.role,
+            "profile_photo": user.profile_picture.url if user.profile_picture else None,
+        },
+        "onboarding": {
+            "flags": user.onboarding_flags,
+            "steps": user.onboarding_state(),
+            "next_step": next(
+                (message for flag, message in Onboarding.LOGIN_STEPS if not user.has_onboarded(flag)), None
+            ),
+        },
+        "tier": tier_state(profile.tier, profile.errands_completed) if profile else tier_state("tier_1", 0),
+        "terms": {
+            "accepted": bool(terms and terms.accepted),
+            "accepted_at": terms.accepted_at if terms else None,
+        },
+        "wallet": {"balance": str(wallet.balance), "currency": wallet.currency} if wallet else None,
+        "runner_profile": {
+            "tier": runner.tier,
+            "rating": runner.rating,
+            "latitude": runner.latitude,
+            "longitude": runner.longitude,
+        } if runner else None,
+        "latest_task": {
+            "id": str(user.latest_task_id),
+            "title": user.latest_task_title,
+            "status": user.latest_task_status,
+            "created_at": user.latest_task_created_at,
+        } if user.latest_task_id else None,
+    }
+
+
+def get_session(user_id):
+    # Wallet funding and tier changes invalidate from Celery and the outbox relay,
+    # which a per-process cache never hears about; build it fresh there instead.
+    if not is_shared():
+        return build_session(user_id)
+    key = SESSION_KEY.format(user_id=user_id)
+    session = cache.get(key)
+    if session is None:
+        session = build_session(user_id)
+        cache.set(key, session, settings.SESSION_BOOTSTRAP_CACHE_SECONDS)
+    return session
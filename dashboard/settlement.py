@@ -0,0 +1,164 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction, DatabaseError
+from django.db.models import F, Case, When, Value, DecimalField, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core import outbox
+from . import events, statistics
+from .escrow import RELEASE, ledger_reference, publish_released
+from .session import invalidate_session
+from .models import Errand, Escrow, EscrowOperation, Task, Transaction, Wallet
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SettlementReport:
+    settled: int = 0
+    failed: int = 0
+    chunks: int = 0
+    wallets: int = 0
+    amount: Decimal = Decimal("0.00")
+    elapsed: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def throughput(self):
+        return self.settled / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "settled": self.settled,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "wallets": self.wallets,
+            "amount": str(self.amount),
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 1),
+            "errors": self.errors,
+        }
+
+
+def settleable_escrows():
+    # Tasks and errands marked completed while ESCROW_BATCH_SETTLEMENT is on.
+    return Escrow.objects.filter(
+        Q(task__status=Task.Status.COMPLETED, task__worker__isnull=False)
+        | Q(errand__status=Errand.Status.COMPLETED, errand__runner__isnull=False),
+        status=Escrow.Status.HELD,
+    )
+
+
+def _ensure_wallets(user_ids):
+    wallets = dict(Wallet.objects.filter(user_id__in=user_ids).values_list("user_id", "pk"))
+    missing = [user_id for user_id in user_ids if user_id not in wallets]
+    if missing:
+        Wallet.objects.bulk_create([Wallet(user_id=user_id) for user_id in missing], ignore_conflicts=True)
+        wallets = dict(Wallet.objects.filter(user_id__in=user_ids).values_list("user_id", "pk"))
+    return wallets
+
+
+def settle_chunk(escrow_ids):
+    with transaction.atomic():
+        # skip_locked lets a concurrent single release (or another settlement
+        # worker) keep its rows; they are simply left for the next run.
+        rows = list(
+            Escrow.objects
+            .select_for_update(skip_locked=True, of=("self",))
+            .filter(pk__in=escrow_ids, status=Escrow.Status.HELD)
+            .annotate(
+                payee=Coalesce("task__worker_id", "errand__runner_id"),
+                payer=Coalesce("task__poster_id", "errand__user_id"),
+            )
+            .values_list("pk", "amount", "version", "payee", "payer", "task_id", "errand_id")
+        )
+        if not rows:
+            return 0, Decimal("0.00"), 0
+
+        now = timezone.now()
+        Escrow.objects.filter(pk__in=[row[0] for row in rows]).update(
+            status=Escrow.Status.RELEASED, released_at=now, version=F("version") + 1
+        )
+
+        totals = {}
+        for _, amount, _, worker_id, _, _, _ in rows:
+            totals[worker_id] = totals.get(worker_id, Decimal("0.00")) + amount
+        wallets = _ensure_wallets(list(totals))
+
+        # One UPDATE credits every worker wallet in the chunk with its own total.
+        Wallet.objects.filter(pk__in=[wallets[worker_id] for worker_id in totals]).update(
+            balance=F("balance") + Case(
+                *[When(pk=wallets[worker_id], then=Value(total)) for worker_id, total in totals.items()],
+                default=Value(Decimal("0.00")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            updated_at=now,
+        )
+
+        Transaction.objects.bulk_create([
+            Transaction(
+                wallet_id=wallets[worker_id],
+                amount=amount,
+                transaction_type=Transaction.TransactionType.CREDIT,
+                description=f"Escrow release for {escrow_id}",
+                reference=ledger_reference(escrow_id, RELEASE),
+            )
+            for escrow_id, amount, _, worker_id, _, _, _ in rows
+        ])
+        EscrowOperation.objects.bulk_create([
+            EscrowOperation(
+                escrow_id=escrow_id,
+                action=RELEASE,
+                idempotency_key=f"{escrow_id}:{RELEASE}",
+                version=version + 1,
+            )
+            for escrow_id, _, version, _, _, _, _ in rows
+        ])
+        for escrow_id, amount, _, worker_id, poster_id, _, errand_id in rows:
+            publish_released(escrow_id, amount, poster_id, worker_id, errand_id)
+        invalidate_session({user_id for row in rows for user_id in row[3:5]})
+        # One event per chunk, so statistics are updated once per poster rather than per escrow.
+        outbox.emit(events.ERRAND_COMPLETED, {"completions": [
+            statistics.completion(
+                "task" if task_id else "errand", task_id or errand_id, poster_id, amount, worker_id
+            )
+            for _, amount, _, worker_id, poster_id, task_id, errand_id in rows
+        ]})
+
+    return len(rows), sum(totals.values(), Decimal("0.00")), len(totals)
+
+
+def settle_completed(chunk_size=500, limit=None):
+    report = SettlementReport()
+    started = time.monotonic()
+    last_pk = None
+
+    while limit is None or report.settled + report.failed < limit:
+        batch_size = chunk_size if limit is None else min(chunk_size, limit - report.settled - report.failed)
+        queryset = settleable_escrows().order_by("pk")
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        escrow_ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not escrow_ids:
+            break
+        last_pk = escrow_ids[-1]
+
+        try:
+            settled, amount, wallets = settle_chunk(escrow_ids)
+        except DatabaseError as e:
+            logger.exception("Escrow settlement chunk failed")
+            report.failed += len(escrow_ids)
+            report.errors.append(str(e))
+        else:
+            report.settled += settled
+            report.amount += amount
+            report.wallets += wallets
+        report.chunks += 1
+
+    report.elapsed = time.monotonic() - started
+    logger.info("Escrow settlement finished: %s", report.as_dict())
+    return report
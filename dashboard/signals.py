@@ -1,9 +1,54 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django.contrib.auth.models import User
-from .models import UserProfile
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+from django.contrib.auth import get_user_model
+from core import outbox
+from .models import UserProfile, Task
+from . import events, feed
+from .session import invalidate_session
 
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
+# Sent once per bulk insert, since bulk_create() skips post_save.
+errands_bulk_created = Signal()
+
+@receiver(post_save, sender=get_user_model())
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Task)
+def invalidate_poster_session(sender, instance, **kwargs):
+    # The bootstrap payload carries the poster's latest task.
+    invalidate_session([instance.poster_id])
+
+
+def emit_created(entries):
+    # Notifications and recommendation pushes run from the outbox relay, so the
+    # write path only pays for one extra INSERT in the same transaction.
+    if entries:
+        outbox.emit(events.ERRAND_CREATED, {
+            "errand_type": entries[0].errand_type,
+            "source_ids": [entry.source_id for entry in entries],
+        })
+
+
+@receiver(errands_bulk_created)
+def sync_bulk_feed_entries(sender, instances, **kwargs):
+    entries = feed.sync_entries(sender, instances)
+    emit_created(entries)
+
+
+def sync_feed_entry(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    entries = feed.sync_entry(instance)
     if created:
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        emit_created(entries)
+
+
+def remove_feed_entry(sender, instance, **kwargs):
+    feed.remove_entry(instance)
+
+
+for source in feed.SOURCES:
+    post_save.connect(sync_feed_entry, sender=source, dispatch_uid=f"feed_sync_{source.__name__}")
+    post_delete.connect(remove_feed_entry, sender=source, dispatch_uid=f"feed_remove_{source.__name__}")
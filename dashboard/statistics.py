@@ -0,0 +1,148 @@
+import re
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Least, NullIf
+
+from .models import ErrandFeedEntry, Errand, Escrow, Task, TaskStatistic
+
+DURATION_UNITS = {
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+}
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z]+)")
+
+
+def parse_estimated_duration(value):
+    """Reads free-text estimates such as "2 hours", "1h 30m" or "45 mins"; unknown text is zero."""
+    seconds = 0.0
+    for amount, unit in DURATION_PART.findall((value or "").lower()):
+        seconds += float(amount) * DURATION_UNITS.get(unit, 0)
+    return timedelta(seconds=seconds)
+
+
+def _ratio(numerator, denominator):
+    # NULLIF keeps an empty denominator from dividing by zero; the row then reads 0.
+    return Coalesce(
+        Cast(numerator, DecimalField(max_digits=14, decimal_places=4)) / NullIf(denominator, 0),
+        Value(Decimal("0")),
+        output_field=DecimalField(max_digits=14, decimal_places=4),
+    )
+
+
+def apply_delta(user_id, posted=0, completed=0, spent=Decimal("0.00"), time_saved=timedelta()):
+    """Adds to a user's counters in one UPDATE; rates are derived from the new totals in SQL."""
+    TaskStatistic.objects.bulk_create([TaskStatistic(user_id=user_id)], ignore_conflicts=True)
+    posted_total = F("total_tasks_posted") + posted
+    completed_total = F("total_tasks_completed") + completed
+    spent_total = F("total_spent") + spent
+    TaskStatistic.objects.filter(user_id=user_id).update(
+        total_tasks_posted=posted_total,
+        total_tasks_completed=completed_total,
+        total_spent=spent_total,
+        total_time_saved=F("total_time_saved") + time_saved,
+        success_rate=Least(_ratio(completed_total * 100, posted_total), Value(Decimal("100"))),
+        average_cost_per_errand=_ratio(spent_total, completed_total),
+    )
+
+
+def record_posted(entries):
+    counts = defaultdict(int)
+    for entry in entries:
+        if entry.owner_id:
+            counts[entry.owner_id] += 1
+    for user_id, count in counts.items():
+        apply_delta(user_id, posted=count)
+
+
+def record_completed(completions):
+    errand_ids = [c["source_id"] for c in completions if c["errand_type"] == ErrandFeedEntry.ErrandType.ERRAND]
+    durations = dict(Errand.objects.filter(pk__in=errand_ids).values_list("pk", "estimated_duration"))
+
+    totals = defaultdict(lambda: [0, Decimal("0.00"), timedelta()])
+    for completion in completions:
+        total = totals[completion["owner"]]
+        total[0] += 1
+        total[1] += Decimal(completion["amount"])
+        if completion["errand_type"] == ErrandFeedEntry.ErrandType.ERRAND:
+            total[2] += parse_estimated_duration(durations.get(int(completion["source_id"])))
+    for user_id, (count, spent, time_saved) in totals.items():
+        apply_delta(user_id, completed=count, spent=spent, time_saved=time_saved)
+
+
+def completion(errand_type, source_id, owner_id, amount, runner_id=None):
+    return {
+        "errand_type": errand_type,
+        "source_id": str(source_id),
+        "owner": str(owner_id),
+        "runner": str(runner_id) if runner_id else None,
+        "amount": str(amount),
+    }
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Recomputes every user's statistics from history. Counts and sums are grouped in
+    SQL; only the free-text durations are parsed here. Run it with the outbox relay
+    stopped, or deltas applied meanwhile are overwritten.
+    """
+    stats = defaultdict(lambda: {"posted": 0, "completed": 0, "spent": Decimal("0.00"), "time_saved": timedelta()})
+
+    posted = ErrandFeedEntry.objects.filter(owner__isnull=False).values("owner_id").annotate(n=Count("id"))
+    for row in posted:
+        stats[row["owner_id"]]["posted"] = row["n"]
+
+    released = Escrow.objects.filter(status=Escrow.Status.RELEASED)
+    for owner_field in ("task__poster_id", "errand__user_id"):
+        rows = (
+            released.filter(**{f"{owner_field}__isnull": False})
+            .values(owner_field).annotate(n=Count("id"), spent=Sum("amount"))
+        )
+        for row in rows:
+            user = stats[row[owner_field]]
+            user["completed"] += row["n"]
+            user["spent"] += row["spent"]
+
+    unescrowed = (
+        # Tasks paid through escrow count once it is released, like the live path.
+        Task.objects.filter(status=Task.Status.COMPLETED)
+        .exclude(escrow__status__in=[Escrow.Status.HELD, Escrow.Status.RELEASED])
+        .values("poster_id").annotate(n=Count("id"), spent=Sum("price"))
+    )
+    for row in unescrowed:
+        user = stats[row["poster_id"]]
+        user["completed"] += row["n"]
+        user["spent"] += row["spent"]
+
+    for user_id, estimate in released.filter(errand__isnull=False).values_list("errand__user_id", "errand__estimated_duration"):
+        stats[user_id]["time_saved"] += parse_estimated_duration(estimate)
+
+    TaskStatistic.objects.update(
+        total_tasks_posted=0, total_tasks_completed=0, total_spent=0,
+        total_time_saved=timedelta(), success_rate=0, average_cost_per_errand=0,
+    )
+    rows = []
+    for user_id, user in stats.items():
+        completed = user["completed"]
+        rows.append(TaskStatistic(
+            user_id=user_id,
+            total_tasks_posted=user["posted"],
+            total_tasks_completed=completed,
+            total_spent=user["spent"],
+            total_time_saved=user["time_saved"],
+            success_rate=min(Decimal(100), Decimal(completed * 100) / user["posted"]) if user["posted"] else 0,
+            average_cost_per_errand=user["spent"] / completed if completed else 0,
+        ))
+    TaskStatistic.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True, unique_fields=["user"],
+        update_fields=[
+            "total_tasks_posted", "total_tasks_completed", "total_spent", "total_time_saved",
+            "success_rate", "average_cost_per_errand",
+        ],
+    )
+    return len(rows)
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+
+from authentication.middleware import user_for_token
+from .feed import location_cell
+from .models import ErrandFeedEntry
+from .realtime import FEED_GROUP
+from .serializers import ErrandFeedEntrySerializer
+
+logger = logging.getLogger(__name__)
+
+REPLAY_LIMIT = 200
+
+
+def open_entries_after(last_id, limit=REPLAY_LIMIT):
+    return list(
+        ErrandFeedEntry.objects
+        .filter(id__gt=last_id, status=ErrandFeedEntry.Status.OPEN)
+        .order_by("id")[:limit]
+    )
+
+
+def latest_entry_id():
+    return ErrandFeedEntry.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+class FeedFilter:
+
+    def __init__(self, user_id, errand_type=None, category=None, cell=None):
+        self.user_id = user_id
+        self.errand_type = errand_type
+        self.category = category
+        self.cell = cell
+
+    @classmethod
+    def from_request(cls, request, user):
+        params = request.GET
+        cell = params.get("cell")
+        if not cell and (params.get("location") or params.get("latitude")):
+            try:
+                latitude = float(params["latitude"]) if params.get("latitude") else None
+                longitude = float(params["longitude"]) if params.get("longitude") else None
+            except ValueError:
+                latitude = longitude = None
+            cell = location_cell(latitude, longitude, params.get("location", ""))
+        return cls(user.pk, params.get("type"), params.get("category"), cell)
+
+    def matches(self, entry):
+        return (
+            entry.owner_id != self.user_id
+            and (not self.errand_type or entry.errand_type == self.errand_type)
+            and (not self.category or entry.category == self.category)
+            and (not self.cell or entry.location_cell == self.cell)
+        )
+
+
+class FeedBroadcaster:
+    """
+    One per process. A single task reads new feed entries once per wake-up and
+    hands them to every connected stream, so idle clients cost a queue each,
+    not a thread or a query. Wake-ups come from the channel layer, with a slow
+    poll as a fallback for posts the layer never saw.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.task = None
+        self.last_id = 0
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=settings.SSE_CLIENT_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def run(self):
+        layer = get_channel_layer()
+        channel = None
+        if layer is not None:
+            channel = await layer.new_channel()
+            await layer.group_add(FEED_GROUP, channel)
+        self.last_id = max(self.last_id, await sync_to_async(latest_entry_id)())
+
+        try:
+            while self.subscribers:
+                await self.wait(layer, channel)
+                entries = await sync_to_async(open_entries_after)(self.last_id)
+                if entries:
+                    self.last_id = entries[-1].id
+                    self.dispatch(entries)
+        except Exception:
+            logger.exception("Feed broadcaster stopped")
+        finally:
+            if channel is not None:
+                await layer.group_discard(FEED_GROUP, channel)
+
+    async def wait(self, layer, channel):
+        if channel is None:
+            await asyncio.sleep(settings.SSE_POLL_SECONDS)
+            return
+        try:
+            await asyncio.wait_for(layer.receive(channel), timeout=settings.SSE_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+    def dispatch(self, entries):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(entries)
+            except asyncio.QueueFull:
+                # Backpressure: a client too slow to drain its queue is told to
+                # resync from the database instead of buffering without bound.
+                queue.lagged = True
+
+
+broadcaster = FeedBroadcaster()
+
+
+def format_event(entry):
+    data = json.dumps(ErrandFeedEntrySerializer(entry).data, cls=DjangoJSONEncoder)
+    return f"id: {entry.id}\nevent: errand\ndata: {data}\n\n"
+
+
+async def replay(feed_filter, last_id):
+    # Reads the log in pages until it catches up, for resume and lag recovery.
+    while True:
+        entries = await sync_to_async(open_entries_after)(last_id)
+        if not entries:
+            return
+        for entry in entries:
+            if feed_filter.matches(entry):
+                yield entry
+        last_id = entries[-1].id
+
+
+async def event_stream(feed_filter, last_id):
+    queue = broadcaster.subscribe()
+    try:
+        yield f"retry: {settings.SSE_RETRY_MILLISECONDS}\n\n"
+        resync = last_id is not None
+        if last_id is None:
+            last_id = await sync_to_async(latest_entry_id)()
+
+        while True:
+            if resync:
+                resync = False
+                async for entry in replay(feed_filter, last_id):
+                    last_id = entry.id
+                    yield format_event(entry)
+
+            try:
+                batch = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if getattr(queue, "lagged", False):
+                queue.lagged = False
+                while not queue.empty():
+                    queue.get_nowait()
+                resync = True
+                continue
+
+            for entry in batch:
+                if entry.id <= last_id:
+                    continue
+                last_id = entry.id
+                if feed_filter.matches(entry):
+                    yield format_event(entry)
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+def _raw_token(request):
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):]
+    # EventSource cannot set headers, so browsers pass the token in the query string.
+    return request.GET.get("token")
+
+
+def _last_event_id(request):
+    value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    return int(value) if value and value.isdigit() else None
+
+
+async def errand_feed_stream(request):
+    raw_token = _raw_token(request)
+    user = await user_for_token(raw_token) if raw_token else None
+    if user is None or not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    response = StreamingHttpResponse(
+        event_stream(FeedFilter.from_request(request, user), _last_event_id(request)),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,15 @@
+from django.conf import settings
+
+from core.jobs import ANALYTICS, PAYMENTS, job
+from .recommendations import refresh_active_runners
+from .settlement import settle_completed
+
+
+@job(ANALYTICS)
+def refresh_recommendations(days=None):
+    return refresh_active_runners(days=days)
+
+
+@job(PAYMENTS)
+def settle_escrows(chunk_size=None):
+    return settle_completed(chunk_size=chunk_size or settings.ESCROW_SETTLEMENT_CHUNK_SIZE).as_dict()
@@ -0,0 +1,5 @@
+from core.ratelimit import UserBucketThrottle
+
+
+class ErrandApplyThrottle(UserBucketThrottle):
+    scope = "errand_apply"
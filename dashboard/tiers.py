@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from authentication.tokens import refresh_principals
+from core.cache import is_shared
+from .models import UserProfile
+
+TIER_2_ERRANDS = 3
+
+TIER_KEY = "tiers:user:{user_id}"
+TIER_TTL = 60 * 60
+
+
+def tier_state(tier, errands_completed):
+    return {
+        "tier": tier,
+        "errands_completed": errands_completed,
+        "errands_left_for_next_tier": max(0, TIER_2_ERRANDS - errands_completed),
+    }
+
+
+def get_tier(user_id):
+    """
+    Cached tier of a user; a miss is one read on the profile's unique user index.
+    Promotions are invalidated from the outbox relay, so a per-process cache is
+    bypassed rather than left serving a stale tier.
+    """
+    key = TIER_KEY.format(user_id=user_id)
+    shared = is_shared()
+    state = cache.get(key) if shared else None
+    if state is None:
+        row = UserProfile.objects.filter(user_id=user_id).values_list("tier", "errands_completed").first()
+        state = tier_state(*(row or ("tier_1", 0)))
+        if shared:
+            cache.set(key, state, TIER_TTL)
+    return state
+
+
+def invalidate_tiers(user_ids):
+    from .session import invalidate_session
+
+    keys = [TIER_KEY.format(user_id=user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    invalidate_session(user_ids)
+
+
+def record_runner_completions(counts):
+    """Adds completed errands per runner and promotes them in the same UPDATE once they qualify."""
+    for user_id, count in counts.items():
+        UserProfile.objects.filter(user_id=user_id).update(
+            errands_completed=F("errands_completed") + count,
+            tier=Case(
+                When(tier="tier_1", errands_completed__gte=TIER_2_ERRANDS - count, then=Value("tier_2")),
+                default=F("tier"),
+            ),
+        )
+    invalidate_tiers(counts)
+    # Tokens carry the tier as a claim.
+    refresh_principals(counts)
@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
@@ -13,12 +16,28 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import generics, filters, permissions
+from core import outbox
+from core.jobs import enqueue
+from core.tasks import normalize_image
+from . import events
+from .applications import accept_application, reject_application, apply_to_errand, ApplicationError, \
+    NotErrandOwner, AlreadyDecided, ErrandAlreadyAssigned, ErrandClosed
+from .escrow import EscrowError, InsufficientFunds, InvalidTransition, ConcurrentUpdate, \
+    hold, release, refund, complete
 from .models import Task, Escrow, ErrandImage, PickupDelivery, CareTask, VerificationTask, UserProfile, Errand, \
-    ErrandApplication, Review
+    ErrandApplication, Review, ReviewArchive, ErrandFeedEntry, TaskStatistic
 
 from .serializers import TaskSerializer, SupermarketRunSerializer, PickupDeliverySerializer, ErrandImageSerializer, \
     CareTaskSerializer, VerificationTaskSerializer, UserTierSerializer, ErrandSerializer, TaskWithRunnerSerializer, \
-    ErrandApplicationSerializer, ReviewSerializer, RunnerDetailsSerializer
+    ErrandApplicationSerializer, ReviewSerializer, RunnerDetailsSerializer, ErrandFeedEntrySerializer, \
+    TaskStatisticSerializer
+from .exports import EXPORTS, CONTENT_TYPES, export_stream, parse_bound
+from .pagination import FeedCursorPagination
+from .recommendations import get_top_list, discard_from_top_list
+from .signals import errands_bulk_created
+from .throttles import ErrandApplyThrottle
+from .session import get_session
+from .tiers import get_tier
 
 
 class CreateTaskView(generics.CreateAPIView):
@@ -65,6 +84,7 @@ class CreateTaskView(generics.CreateAPIView):
             "data": serializer.data
         }, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(poster=self.request.user)
 
@@ -109,7 +129,8 @@ class SupermarketRunCreateView(APIView):
 
         serializer = SupermarketRunSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response({
                 "message": "Supermarket Run Created",
                 "data": serializer.data
@@ -202,7 +223,8 @@ class PickupDeliveryCreateView(APIView):
     def post(self, request):
         serializer = PickupDeliverySerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            with transaction.atomic():
+                serializer.save(user=request.user)
             return Response(
                 {"message": "Pickup & delivery task created successfully", "data": serializer.data},
                 status=status.HTTP_201_CREATED,
@@ -269,6 +291,7 @@ class ErrandImageUploadView(APIView):
                 )
 
         errand_image = ErrandImage.objects.create(image=image_file, errand=errand)
+        enqueue(normalize_image, "dashboard.ErrandImage", str(errand_image.pk), "image")
         serializer = ErrandImageSerializer(errand_image, context={"request": request})
 
         return Response(
@@ -326,6 +349,7 @@ class CareTaskCreateView(generics.CreateAPIView):
             status=status.HTTP_201_CREATED
         )
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -358,9 +382,139 @@ class VerificationTaskCreateView(generics.CreateAPIView):
 
         return self.create(request, *args, **kwargs)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+class BulkCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = None
+    success_message = "Errands created successfully"
+
+    def post(self, request, *args, **kwargs):
+        items = request.data.get("items") if isinstance(request.data, dict) else request.data
+        serializer = self.serializer_class(
+            data=items,
+            many=True,
+            allow_empty=False,
+            max_length=settings.BULK_CREATE_MAX_ITEMS,
+        )
+        if not serializer.is_valid():
+            return Response(
+                {"success": False, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            instances = serializer.save(user=request.user)
+            errands_bulk_created.send(
+                sender=self.serializer_class.Meta.model,
+                user=request.user,
+                instances=instances,
+            )
+
+        return Response(
+            {
+                "success": True,
+                "message": self.success_message,
+                "count": len(instances),
+                "ids": [instance.pk for instance in instances],
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+bulk_request_body = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        "items": openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_OBJECT),
+            description="List of objects, each shaped like the single-create payload",
+        ),
+    },
+    required=["items"],
+)
+
+bulk_responses = {
+    201: openapi.Response(
+        description="All items created",
+        examples={
+            "application/json": {
+                "success": True,
+                "message": "Errands created successfully",
+                "count": 2,
+                "ids": [41, 42]
+            }
+        },
+    ),
+    400: openapi.Response(
+        description="Validation errors, one entry per submitted item (empty when the item is valid)",
+        examples={
+            "application/json": {
+                "success": False,
+                "errors": [{}, {"price_min": ["This field is required."]}]
+            }
+        },
+    ),
+    401: "Unauthorized",
+}
+
+
+class BulkErrandCreateView(BulkCreateView):
+    serializer_class = ErrandSerializer
+
+    @swagger_auto_schema(
+        operation_summary="Bulk create errands",
+        operation_description="Validates every item and inserts them all in one transaction, or none if any item is invalid.",
+        request_body=bulk_request_body,
+        responses=bulk_responses,
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
+class BulkPickupDeliveryCreateView(BulkCreateView):
+    serializer_class = PickupDeliverySerializer
+    success_message = "Pickup & delivery tasks created successfully"
+
+    @swagger_auto_schema(
+        operation_summary="Bulk create pickup & delivery errands",
+        request_body=bulk_request_body,
+        responses=bulk_responses,
+        tags=["Pickup & Delivery"],
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
+class BulkCareTaskCreateView(BulkCreateView):
+    serializer_class = CareTaskSerializer
+    success_message = "Care tasks created successfully"
+
+    @swagger_auto_schema(
+        operation_summary="Bulk create care tasks",
+        request_body=bulk_request_body,
+        responses=bulk_responses,
+        tags=["Care Tasks"],
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
+class BulkVerificationTaskCreateView(BulkCreateView):
+    serializer_class = VerificationTaskSerializer
+    success_message = "Verification tasks created successfully"
+
+    @swagger_auto_schema(
+        operation_summary="Bulk create verification tasks",
+        request_body=bulk_request_body,
+        responses=bulk_responses,
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
 class UserTierView(generics.RetrieveAPIView):
     serializer_class = UserTierSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -374,15 +528,48 @@ class UserTierView(generics.RetrieveAPIView):
         responses={200: UserTierSerializer}
     )
     def get(self, request, *args, **kwargs):
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
-        profile.update_tier()
-        serializer = self.get_serializer(profile)
-        return self.response_ok(serializer.data)
+        # Tiers only change when a completion event is handled, so reads never write.
+        return self.response_ok(get_tier(request.user.pk))
 
     def response_ok(self, data):
         from rest_framework.response import Response
         return Response(data)
 
+class SessionBootstrapView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Bootstrap the app session",
+        operation_description=(
+            "Returns the user's onboarding state, tier, terms acceptance, wallet, runner profile "
+            "and latest posted task in one response, so app launch needs a single request."
+        ),
+        responses={200: "Session state", 401: "Unauthorized"},
+    )
+    def get(self, request):
+        session = get_session(request.user.pk)
+        photo = session["user"]["profile_photo"]
+        if photo:
+            session = {**session, "user": {**session["user"], "profile_photo": request.build_absolute_uri(photo)}}
+        return Response({"success": True, "data": session})
+
+
+class TaskStatisticView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Get the poster's errand statistics",
+        operation_description=(
+            "Returns totals kept current by the errand event handlers: errands posted and completed, "
+            "success rate, money spent, average cost per errand and time saved."
+        ),
+        responses={200: TaskStatisticSerializer}
+    )
+    def get(self, request):
+        stats = TaskStatistic.objects.filter(user=request.user).first() or TaskStatistic(user=request.user)
+        return Response(TaskStatisticSerializer(stats).data)
+
+
 class PostedErrandsView(generics.ListCreateAPIView):
     serializer_class = ErrandSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -406,6 +593,7 @@ class PostedErrandsView(generics.ListCreateAPIView):
 
         return queryset
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -490,6 +678,8 @@ class RecommendedTasksView(generics.ListAPIView):
         operation_summary="Get recommended errands",
         operation_description=(
             "Retrieve errands that are currently open or available for runners.\n"
+            "Without filters, errands are ranked for the runner by distance, usual price, "
+            "category history, deadline urgency and tier eligibility.\n"
             "You can filter by category, search by title/description/location, "
             "and sort by recent or price range."
         ),
@@ -520,8 +710,38 @@ class RecommendedTasksView(generics.ListAPIView):
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
+    def is_ranked(self):
+        params = self.request.query_params
+        return not any(params.get(name) for name in ("search", "sort", "category", "location", "ordering"))
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_ranked():
+            return super().list(request, *args, **kwargs)
+
+        page = self.paginate_queryset(get_top_list(request.user))
+        still_open = set(
+            int(source_id) for source_id in ErrandFeedEntry.objects.filter(
+                errand_type=ErrandFeedEntry.ErrandType.ERRAND,
+                source_id__in=[str(errand_id) for errand_id in page],
+                status=ErrandFeedEntry.Status.OPEN,
+            ).values_list("source_id", flat=True)
+        )
+        taken = [errand_id for errand_id in page if errand_id not in still_open]
+        if taken:
+            discard_from_top_list(request.user.pk, taken)
+
+        errands = Errand.objects.select_related("user", "category").in_bulk(still_open)
+        ordered = [errands[errand_id] for errand_id in page if errand_id in errands]
+        serializer = self.get_serializer(ordered, many=True)
+        return self.get_paginated_response(serializer.data)
+
     def get_queryset(self):
-        queryset = Errand.objects.exclude(user=self.request.user).order_by("-created_at")
+        queryset = (
+            Errand.objects
+            .filter(status=Errand.Status.OPEN, deadline__gt=timezone.now())
+            .exclude(user=self.request.user)
+            .order_by("-created_at")
+        )
 
         search = self.request.query_params.get("search")
         sort = self.request.query_params.get("sort")
@@ -580,8 +800,11 @@ class AvailableTasksView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
 
+        # Served from errand_open_created_idx; the deadline check covers errands
+        # that lapsed since maintenance last ran.
         queryset = (
             Errand.objects
+            .filter(status=Errand.Status.OPEN, deadline__gt=timezone.now())
             .exclude(user=user)
             .order_by('-created_at')
         )
@@ -600,35 +823,44 @@ class AvailableTasksView(generics.ListAPIView):
 class ApplyErrandView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ErrandApplicationSerializer
+    throttle_classes = [ErrandApplyThrottle]
 
-    @swagger_auto_schema(operation_summary="Apply to an Errand")
+    @swagger_auto_schema(
+        operation_summary="Apply to an Errand",
+        responses={
+            201: ErrandApplicationSerializer,
+            400: "Own errand, already applied or errand already assigned",
+            404: "Errand not found",
+            429: "Too many applications",
+        },
+    )
     def post(self, request, errand_id):
-        errand = get_object_or_404(Errand, id=errand_id)
-
-        if errand.user == request.user:
-            return Response(
-                {"detail": "You cannot apply to your own errand."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if ErrandApplication.objects.filter(errand=errand, runner=request.user).exists():
-            return Response(
-                {"detail": "You have already applied for this errand."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        serializer = self.get_serializer(
-            data=request.data,
-            context={"request": request}
-        )
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        serializer.save(
-            runner=request.user,
-            errand=errand
-        )
-
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        try:
+            application = apply_to_errand(
+                errand_id,
+                request.user,
+                serializer.validated_data["offer_amount"],
+                serializer.validated_data.get("message", ""),
+            )
+        except Errand.DoesNotExist:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        except ApplicationError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {
+            "id": application.id,
+            "errand": application.errand_id,
+            "runner": application.runner_id,
+            "runner_name": request.user.username,
+            "offer_amount": str(application.offer_amount),
+            "message": application.message,
+            "status": application.status,
+            "created_at": application.created_at,
+        }
+        return Response(data, status=status.HTTP_201_CREATED)
 
 class ErrandApplicationsListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -640,21 +872,54 @@ class ErrandApplicationsListView(generics.ListAPIView):
         return ErrandApplication.objects.filter(errand_id=errand_id)
 
 
-class UpdateApplicationStatusView(generics.UpdateAPIView):
+class UpdateApplicationStatusView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = ErrandApplicationSerializer
-    lookup_url_kwarg = "application_id"
 
-    @swagger_auto_schema(operation_summary="Accept or Reject an Application")
-    def patch(self, request, *args, **kwargs):
-        application = self.get_object()
+    @swagger_auto_schema(
+        operation_summary="Accept or Reject an Application",
+        operation_description=(
+            "Accepting assigns the runner, rejects every other pending application "
+            "and holds the offer amount in escrow, all in one transaction."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["status"],
+            properties={"status": openapi.Schema(type=openapi.TYPE_STRING, enum=["accepted", "rejected"])},
+        ),
+        responses={
+            200: "Application updated",
+            400: "Invalid status or insufficient funds",
+            403: "Only the errand owner can decide",
+            404: "Application not found",
+            409: "Errand already assigned or application already decided",
+        },
+    )
+    def patch(self, request, application_id):
         status_value = request.data.get("status")
         if status_value not in ["accepted", "rejected"]:
             return Response({"detail": "Invalid status."}, status=status.HTTP_400_BAD_REQUEST)
 
-        application.status = status_value
-        application.save()
-        return Response({"detail": f"Application {status_value} successfully."})
+        try:
+            if status_value == "accepted":
+                application, escrow, rejected = accept_application(application_id, request.user)
+            else:
+                application = reject_application(application_id, request.user)
+        except ErrandApplication.DoesNotExist:
+            return Response({"detail": "Application not found."}, status=status.HTTP_404_NOT_FOUND)
+        except NotErrandOwner as e:
+            return Response({"detail": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except (AlreadyDecided, ErrandAlreadyAssigned, ErrandClosed, ConcurrentUpdate) as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+        except EscrowError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {"detail": f"Application {status_value} successfully."}
+        if status_value == "accepted":
+            data.update(
+                rejected_count=rejected,
+                escrow={"id": str(escrow.id), "status": escrow.status, "amount": str(escrow.amount)},
+            )
+        return Response(data)
 
 class ReviewRunnerView(generics.CreateAPIView):
     serializer_class = ReviewSerializer
@@ -701,7 +966,10 @@ class ReviewRunnerView(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if hasattr(application, "review"):
+        # An archived review was written after its application, so only the
+        # archive partitions from then on are searched.
+        if hasattr(application, "review") or ReviewArchive.objects.filter(
+                errand=application, created_at__gte=application.created_at).exists():
             return Response(
                 {"detail": "You have already reviewed this runner."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -709,14 +977,12 @@ class ReviewRunnerView(generics.CreateAPIView):
 
         serializer = ReviewSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        review = serializer.save(errand=application, reviewer=request.user)
-
-        profile = application.runner.profile
-        all_reviews = Review.objects.filter(errand__runner=application.runner)
-        total = sum(r.rating for r in all_reviews)
-        count = all_reviews.count()
-        profile.rating = total / count
-        profile.save()
+        with transaction.atomic():
+            review = serializer.save(errand=application, reviewer=request.user)
+            # The runner's rating is recomputed by the outbox relay.
+            outbox.emit(events.REVIEW_CREATED, {
+                "review": review.pk, "runner": str(application.runner_id),
+            }, aggregate=review)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -762,4 +1028,251 @@ class AppliedRunnerDetailsView(generics.RetrieveAPIView):
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context["request"] = self.request
-        return context
\ No newline at end of file
+        return context
+
+
+class ExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Stream an export of errands, applications, reviews or wallet transactions",
+        operation_description=(
+            "Streams every row as CSV or NDJSON without paging. "
+            "Rows are scoped to the logged-in user; staff can pass scope=all to export everything. "
+            "Archived history is included; since/until narrow the export by creation date."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'dataset', openapi.IN_PATH,
+                description="errands, applications, reviews or transactions",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'file_format', openapi.IN_PATH,
+                description="csv or ndjson",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'scope', openapi.IN_QUERY,
+                description="Staff only: 'all' exports rows for every user",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'since', openapi.IN_QUERY,
+                description="Only rows created on or after this date (YYYY-MM-DD)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'until', openapi.IN_QUERY,
+                description="Only rows created on or before this date (YYYY-MM-DD)",
+                type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={200: "Streamed file", 400: "Unknown dataset, format or date", 401: "Unauthorized"},
+    )
+    def get(self, request, dataset, file_format):
+        if dataset not in EXPORTS or file_format not in CONTENT_TYPES:
+            return Response(
+                {"detail": "Unknown dataset or format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            since = parse_bound(request.query_params.get("since"))
+            until = parse_bound(request.query_params.get("until"))
+        except ValueError:
+            return Response(
+                {"detail": "since and until must be dates (YYYY-MM-DD)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        everything = request.user.is_staff and request.query_params.get("scope") == "all"
+        response = StreamingHttpResponse(
+            export_stream(dataset, file_format, request.user, everything=everything, since=since, until=until),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{file_format}"'
+        return response
+
+
+feed_filter_parameters = [
+    openapi.Parameter(
+        'type', openapi.IN_QUERY,
+        description="Filter by errand type (task, errand, pickup_delivery, care_task, verification_task, supermarket_run)",
+        type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        'category', openapi.IN_QUERY,
+        description="Filter by category",
+        type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        'cell', openapi.IN_QUERY,
+        description="Filter by location cell",
+        type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        'cursor', openapi.IN_QUERY,
+        description="Opaque cursor from the previous page's next/previous link",
+        type=openapi.TYPE_STRING
+    ),
+]
+
+
+class FeedFilterMixin:
+
+    def filter_feed(self, queryset):
+        errand_type = self.request.query_params.get("type")
+        category = self.request.query_params.get("category")
+        cell = self.request.query_params.get("cell")
+
+        if errand_type:
+            queryset = queryset.filter(errand_type=errand_type)
+        if category:
+            queryset = queryset.filter(category=category)
+        if cell:
+            queryset = queryset.filter(location_cell=cell)
+
+        return queryset
+
+
+class ErrandFeedView(FeedFilterMixin, generics.ListAPIView):
+    serializer_class = ErrandFeedEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedCursorPagination
+
+    @swagger_auto_schema(
+        operation_summary="Open errands of every type",
+        operation_description=(
+            "Open tasks, errands, pickups, care, verification and supermarket runs posted by other users, "
+            "newest first, from a single indexed query with cursor pagination."
+        ),
+        manual_parameters=feed_filter_parameters,
+        responses={200: ErrandFeedEntrySerializer(many=True)},
+    )
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = (
+            ErrandFeedEntry.objects
+            .filter(status=ErrandFeedEntry.Status.OPEN)
+            .exclude(owner=self.request.user)
+        )
+        return self.filter_feed(queryset)
+
+
+class MyPostedFeedView(FeedFilterMixin, generics.ListAPIView):
+    serializer_class = ErrandFeedEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedCursorPagination
+
+    @swagger_auto_schema(
+        operation_summary="Everything I have posted, across errand types",
+        manual_parameters=feed_filter_parameters + [
+            openapi.Parameter(
+                'status', openapi.IN_QUERY,
+                description="Filter by status",
+                type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={200: ErrandFeedEntrySerializer(many=True)},
+    )
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = ErrandFeedEntry.objects.filter(owner=self.request.user)
+
+        status_value = self.request.query_params.get("status")
+        if status_value:
+            queryset = queryset.filter(status=status_value)
+
+        return self.filter_feed(queryset)
+
+
+class EscrowActionView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    actions = {"hold": hold, "release": release, "refund": refund, "complete": complete}
+
+    @staticmethod
+    def can_refund(escrow, user):
+        # The poster alone may only take the money back from work nobody has
+        # taken on, or that was cancelled; after that the worker has to give it
+        # up, or an admin settles the dispute.
+        if user.is_staff or user.pk == escrow.payee_id:
+            return True
+        if user.pk != escrow.payer_id:
+            return False
+        if escrow.task_id:
+            return escrow.task.worker_id is None or escrow.task.status == Task.Status.CANCELLED
+        return escrow.errand.runner_id is None or escrow.errand.status == Errand.Status.CANCELLED
+
+    @swagger_auto_schema(
+        operation_summary="Hold, release, refund or complete an escrow",
+        operation_description=(
+            "Moves the escrow through pending -> held -> released/refunded. "
+            "Holding debits the poster's wallet, releasing credits the worker and completes the task, "
+            "refunding credits the poster. Only the poster may hold, release or complete; once a "
+            "worker is assigned, a refund needs the worker or an admin. Completing marks the task or "
+            "errand done; its escrow is released at once, or by the next batch settlement when enabled. "
+            "Retrying with the same Idempotency-Key header is safe."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'action', openapi.IN_PATH,
+                description="hold, release, refund or complete",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'Idempotency-Key', openapi.IN_HEADER,
+                description="Client-generated key; repeating it returns the original result",
+                type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={
+            200: "Escrow updated",
+            400: "Unknown action or insufficient funds",
+            403: "Not allowed to move this escrow",
+            404: "Escrow not found",
+            409: "Invalid transition or concurrent update",
+        },
+        tags=["Escrow"],
+    )
+    def post(self, request, escrow_id, action):
+        if action not in self.actions:
+            return Response({"detail": "Unknown escrow action."}, status=status.HTTP_400_BAD_REQUEST)
+
+        escrow = get_object_or_404(Escrow.objects.select_related("task", "errand"), id=escrow_id)
+        if action == "refund":
+            if not self.can_refund(escrow, request.user):
+                return Response(
+                    {"detail": "Once a worker is assigned, only the worker or an admin can refund this escrow."},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        elif escrow.payer_id != request.user.pk:
+            return Response(
+                {"detail": "Only the poster can move this escrow."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            escrow = self.actions[action](escrow, idempotency_key=request.headers.get("Idempotency-Key"))
+        except InsufficientFunds as e:
+            return Response({"success": False, "detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except (InvalidTransition, ConcurrentUpdate) as e:
+            return Response({"success": False, "detail": str(e)}, status=status.HTTP_409_CONFLICT)
+        except EscrowError as e:
+            return Response({"success": False, "detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "success": True,
+            "message": f"Escrow {escrow.status}.",
+            "data": {
+                "id": str(escrow.id),
+                "status": escrow.status,
+                "amount": str(escrow.amount),
+                "version": escrow.version,
+                "released_at": escrow.released_at,
+            }
+        }, status=status.HTTP_200_OK)